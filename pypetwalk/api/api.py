@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import logging
+import time
 from types import TracebackType
 
 from aiohttp import ClientSession, ClientTimeout
@@ -22,6 +23,7 @@ from pypetwalk.exceptions import (
     PyPetWALKInvalidResponseStatus,
     PyPetWALKUnknownStateError,
 )
+from pypetwalk.requestlog import RequestLogger
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,10 +31,16 @@ _LOGGER = logging.getLogger(__name__)
 class API:
     """Class for handling local API calls."""
 
-    def __init__(self, host: str, port: int) -> None:
+    def __init__(
+        self, host: str, port: int, request_log: RequestLogger | None = None
+    ) -> None:
         """Initialize API class."""
         self.server_host = host
         self.server_port = port
+        self.last_success: float | None = None
+        self.last_failure: float | None = None
+        self.in_flight = 0
+        self.request_log = request_log or RequestLogger(_LOGGER)
         self.session = ClientSession(timeout=ClientTimeout(total=API_REQUEST_TIMEOUT))
 
     async def __aenter__(self) -> API:
@@ -88,25 +96,36 @@ class API:
 
     async def send_command(self, command: str, params: dict | None) -> dict:
         """Send command to local API."""
+        self.in_flight += 1
+        try:
+            return await self.__send_command(command, params)
+        finally:
+            self.in_flight -= 1
+
+    async def __send_command(self, command: str, params: dict | None) -> dict:
+        """Send command to local API and handle the response."""
         method = "GET"
         if params:
             method = "PUT"
 
-        url = f"{API_HTTP_PROTOCOL}://{self.server_host}:{self.server_port}"
-        url = f"{url}{API_PATH_MAPPING[command]}"
-        _LOGGER.info("Calling %s with method %s", url, method)
-        _LOGGER.debug("... and Parameters: %s", params)
+        path = API_PATH_MAPPING[command]
+        url = f"{API_HTTP_PROTOCOL}://{self.server_host}:{self.server_port}{path}"
+        self.request_log.log("api", method, path, params=params)
         if method == "GET":
             try:
                 async with self.__get_session().get(url) as resp:
                     if resp.status != 200:
                         error = f"Incorrect status code received {resp.status}"
                         _LOGGER.error(error)
+                        self.last_failure = time.monotonic()
                         await self.close()
                         raise PyPetWALKInvalidResponseStatus(error)
-                    return await resp.json()  # type: ignore[no-any-return]
+                    result = await resp.json()
+                    self.last_success = time.monotonic()
+                    return result  # type: ignore[no-any-return]
             except (ClientConnectorError, ServerDisconnectedError) as ex:
                 _LOGGER.error("%s", ex)
+                self.last_failure = time.monotonic()
                 await self.close()
                 raise PyPetWALKClientConnectionError(ex) from ex
 
@@ -116,11 +135,14 @@ class API:
                     if resp.status != 202:  # Currently, API returns only 202
                         error = f"Incorrect status code received {resp.status}"
                         _LOGGER.error(error)
+                        self.last_failure = time.monotonic()
                         await self.close()
                         raise PyPetWALKInvalidResponseStatus(error)
+                    self.last_success = time.monotonic()
                     return {}
             except (ClientConnectorError, ServerDisconnectedError) as ex:
                 _LOGGER.debug("%s", ex)
+                self.last_failure = time.monotonic()
                 await self.close()
                 raise PyPetWALKClientConnectionError(ex) from ex
 
@@ -1,5 +1,10 @@
 """Module for the communication via unofficial AWS API."""
 # flake8: noqa
 from .aws import AWS
-from .event import Event
+from .codec import decode_events, decode_pets, encode_events, encode_pets
+from .event import Event, LazyEvent
+from .executor import BlockingExecutor
 from .pet import Pet
+from .ratelimit import RateLimiter
+from .registry import PetRegistry
+from .tokens import FileTokenStore, TokenStore
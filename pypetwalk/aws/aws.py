@@ -2,21 +2,44 @@
 from __future__ import annotations
 
 import asyncio
-import functools
+from collections.abc import AsyncGenerator, AsyncIterator
+from concurrent.futures import Executor
+import contextlib
+import copy
 import logging
+import time
 from types import TracebackType
+from typing import Any
 
-from aiohttp import ClientSession, ClientTimeout
+from aiohttp import ClientResponse, ClientSession, ClientTimeout
 from aiohttp.client_exceptions import ClientConnectorError
-from pycognito import Cognito
 
-from pypetwalk.const import APP_VERSION, AWS_REQUEST_TIMEOUT
+from pypetwalk.const import (
+    APP_VERSION,
+    AWS_EXECUTOR_TIMEOUT,
+    AWS_LOW_PRIORITY_ENDPOINTS,
+    AWS_REQUEST_TIMEOUT,
+    AWS_STREAM_CHUNK_SIZE,
+    AWS_TOKEN_REFRESH_MARGIN,
+)
 from pypetwalk.exceptions import (
     PyPetWALKClientAWSAuthenticationError,
     PyPetWALKClientAWSInvalidTokens,
     PyPetWALKClientConnectionError,
+    PyPetWALKInvalidResponse,
     PyPetWALKInvalidResponseStatus,
+    PyPetWALKRateLimited,
 )
+from pypetwalk.requestlog import RequestLogger
+from pypetwalk.singleflight import SingleFlight
+
+from .cache import ResponseCache
+from .event import Event
+from .executor import BlockingExecutor
+from .ratelimit import RateLimiter
+from .registry import PetRegistry
+from .stream import JSONArrayParser
+from .tokens import TokenStore, get_token_expiry
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,7 +48,17 @@ class AWS:
     """Class for handling AWS API calls."""
 
     def __init__(
-        self, url: str, user_pool_id: str, client_id: str, username: str, password: str
+        self,
+        url: str,
+        user_pool_id: str,
+        client_id: str,
+        username: str,
+        password: str,
+        token_store: TokenStore | None = None,
+        executor: Executor | None = None,
+        executor_timeout: float | None = AWS_EXECUTOR_TIMEOUT,
+        request_log: RequestLogger | None = None,
+        rate_limiter: RateLimiter | None = None,
     ) -> None:
         """Initialize API class."""
         self.url = url
@@ -34,6 +67,22 @@ class AWS:
         self.username = username
         self.password = password
         self.current_aws_user = None
+        self.id_token: str | None = None
+        self.access_token: str | None = None
+        self.refresh_token: str | None = None
+        self.token_expires_at: float | None = None
+        self.token_store = token_store
+        self.executor = BlockingExecutor(executor, timeout=executor_timeout)
+        self.in_flight = 0
+        self.request_log = request_log or RequestLogger(_LOGGER)
+        self._store_loaded = False
+        self._auth_flight = SingleFlight()
+        self._cache_flight = SingleFlight()
+        self._background_tasks: set[asyncio.Task] = set()
+        self.cache = ResponseCache()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self._refresh_task: asyncio.Task | None = None
+        self._refresh_timer: asyncio.TimerHandle | None = None
         self.session = ClientSession(timeout=ClientTimeout(total=AWS_REQUEST_TIMEOUT))
 
     async def __aenter__(self) -> AWS:
@@ -47,34 +96,73 @@ class AWS:
         traceback: TracebackType | None,
     ) -> None:
         """Stop AWS class from context manager."""
-        await self.close()
+        await self.disconnect()
 
     async def close(self) -> None:
         """Wait until all sessions are closed."""
         if self.session:
             await self.session.close()
 
+    async def disconnect(self) -> None:
+        """Stop background tasks, close all sessions and the owned executor."""
+        self.__cancel_refresh_timer()
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresh_task
+            self._refresh_task = None
+        for task in list(self._background_tasks):
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        await self.close()
+        self.executor.shutdown()
+
     async def authenticate(self, username: str, password: str) -> None:
         """Authenticate against AWS Cognito."""
-        # Run authenticate without blocking the event loop
-        loop = asyncio.get_running_loop()
-
-        user = await loop.run_in_executor(
-            None,
-            functools.partial(
-                Cognito, self.user_pool_id, self.client_id, username=username
-            ),
+        # pycognito pulls in boto3, so only import it once AWS is needed
+        from pycognito import (  # pylint: disable=import-outside-toplevel
+            Cognito,
         )
 
+        # Run authenticate without blocking the event loop
         try:
-            await loop.run_in_executor(None, user.authenticate, password)
+            user = await self.executor.run(
+                Cognito, self.user_pool_id, self.client_id, username=username
+            )
+            await self.executor.run(user.authenticate, password)
 
             self.current_aws_user = user
+            self.set_tokens(user.id_token, user.access_token, user.refresh_token)
         except Exception as ex:
             _LOGGER.error("%s", ex)
-            await self.close()
             raise PyPetWALKClientAWSAuthenticationError(ex) from ex
 
+        await self.__save_tokens()
+
+    def set_tokens(
+        self, id_token: str, access_token: str, refresh_token: str | None = None
+    ) -> None:
+        """Set the Cognito tokens and track when they expire."""
+        self.id_token = id_token
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+
+        expiries = [
+            expiry
+            for expiry in (get_token_expiry(id_token), get_token_expiry(access_token))
+            if expiry is not None
+        ]
+        self.token_expires_at = min(expiries) if expiries else None
+        self.__arm_refresh_timer()
+
+    def invalidate_tokens(self) -> None:
+        """Forget the current tokens, so the next request authenticates."""
+        self.id_token = None
+        self.access_token = None
+        self.token_expires_at = None
+        self.__cancel_refresh_timer()
+
     async def get_aws_update_info(self) -> dict:
         """Get Update Infos from AWS."""
         return await self.get("update_info")
@@ -90,50 +178,274 @@ class AWS:
         )
 
     async def get(self, path: str) -> dict:
-        """Get Data from AWS API."""
+        """Get Data from AWS API, served from cache for cacheable paths."""
+        entry = self.cache.get(path)
+        if entry is not None and self.cache.is_fresh(path, entry):
+            self.cache.hits += 1
+            return copy.deepcopy(entry.data)
+
+        if entry is not None and self.cache.is_usable(path, entry):
+            self.cache.stale_hits += 1
+            self.__schedule_revalidation(path)
+            return copy.deepcopy(entry.data)
+
+        if path not in self.cache.ttls:
+            return await self.__counted_get(path)
+
+        self.cache.misses += 1
+        data = await self._cache_flight.run(path, lambda: self.__counted_get(path))
+        # Callers get their own copy, the cached one is shared across requests
+        return copy.deepcopy(data)
+
+    async def __counted_get(self, path: str) -> dict:
+        """Request Data from AWS API, counting the request as in flight."""
+        self.in_flight += 1
+        try:
+            return await self.__get(path)
+        finally:
+            self.in_flight -= 1
+
+    async def iter_timeline(
+        self, door_id: int, interval_days: int, registry: PetRegistry | None = None
+    ) -> AsyncGenerator[Event, None]:
+        """Yield the Events of the timeline while the response is received."""
+        path = f"door_events?deviceID={door_id}&intervalDays={interval_days}"
+        parser = JSONArrayParser()
+        self.in_flight += 1
+        try:
+            async with self.__request(path) as resp:
+                await self.__check_status(path, resp)
+                async for chunk in resp.content.iter_chunked(AWS_STREAM_CHUNK_SIZE):
+                    for entry in parser.feed(chunk):
+                        if (event := self.__parse_event(entry, registry)) is not None:
+                            yield event
+
+                for entry in parser.close():
+                    if (event := self.__parse_event(entry, registry)) is not None:
+                        yield event
+        except ValueError as ex:
+            raise PyPetWALKInvalidResponse(ex) from ex
+        finally:
+            self.in_flight -= 1
+
+    @staticmethod
+    def __parse_event(entry: Any, registry: PetRegistry | None) -> Event | None:
+        """Return the Event of the timeline entry, or None if invalid."""
+        try:
+            return Event(entry, registry)
+        except (AttributeError, ValueError):
+            _LOGGER.debug("Skipping invalid event data %s", entry)
+            return None
+
+    async def __get(self, path: str) -> dict:
+        """Request Data from AWS API."""
+        async with self.__request(path) as resp:
+            return await self.__handle_response(path, resp)
+
+    @contextlib.asynccontextmanager
+    async def __request(self, path: str) -> AsyncIterator[ClientResponse]:
+        """Send a GET request to AWS API, renewing the tokens once on 401."""
         url = f"{self.url}/{path}"
-        _LOGGER.info("Calling AWS URL %s", url)
+        endpoint = path.split("?")[0]
+        await self.rate_limiter.acquire(
+            endpoint, endpoint in AWS_LOW_PRIORITY_ENDPOINTS
+        )
+        self.request_log.log("aws", "GET", path)
         try:
             headers = await self.__headers()
-            async with self.__get_session().get(url, headers=headers) as resp:
-                if resp.status != 200:
-                    error = f"Incorrect status code received {resp.status}"
-                    _LOGGER.error(error)
-                    await self.close()
-                    raise PyPetWALKInvalidResponseStatus(error)
-                return await resp.json()  # type: ignore[no-any-return]
+            headers.update(self.cache.conditional_headers(path))
+            resp = await self.__get_session().get(url, headers=headers)
+            if resp.status == 401:
+                resp.release()
+
+                # Token was revoked or expired earlier than expected, unless a
+                # concurrent request already renewed it
+                _LOGGER.info("Unauthorized, renewing tokens and retrying")
+                if self.id_token == headers["Authorization"]:
+                    self.invalidate_tokens()
+                headers = await self.__headers()
+                headers.update(self.cache.conditional_headers(path))
+                resp = await self.__get_session().get(url, headers=headers)
         except ClientConnectorError as ex:
             _LOGGER.error("%s", ex)
             await self.close()
             raise PyPetWALKClientConnectionError(ex) from ex
 
-    async def __headers(self) -> dict:
-        if self.current_aws_user is None:
-            _LOGGER.info("Missing AWS Authentication, we need to authenticate before")
-            await self.authenticate(self.username, self.password)
+        try:
+            yield resp
+        finally:
+            resp.release()
+
+    async def __handle_response(self, path: str, resp: ClientResponse) -> dict:
+        """Return the JSON data of the response or raise on invalid status."""
+        if resp.status == 304 and (entry := self.cache.revalidated(path)):
+            return entry.data
+
+        await self.__check_status(path, resp)
+        data = await resp.json()
+        self.cache.store(path, data, resp.headers)
+        return data  # type: ignore[no-any-return]
+
+    async def __check_status(self, path: str, resp: ClientResponse) -> None:
+        """Raise if the response has no data."""
+        if resp.status == 429:
+            retry_after = RateLimiter.parse_retry_after(resp.headers.get("Retry-After"))
+            self.rate_limiter.throttle(path.split("?")[0], retry_after)
+            _LOGGER.warning("AWS throttled request to %s", path)
+            raise PyPetWALKRateLimited(
+                f"Throttled request to {path}", retry_after=retry_after
+            )
+
+        if resp.status != 200:
+            error = f"Incorrect status code received {resp.status}"
+            _LOGGER.error(error)
+            await self.close()
+            raise PyPetWALKInvalidResponseStatus(error)
 
+    def __schedule_revalidation(self, path: str) -> None:
+        """Revalidate the cached response in background, if not running yet."""
+        if self._cache_flight.in_flight(path):
+            return
+
+        task = asyncio.create_task(self.__revalidate(path))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def __revalidate(self, path: str) -> None:
+        """Revalidate the cached response, keeping it on failure."""
         try:
-            _LOGGER.info("Check for Valid tokens, if not valid, renew")
-            # Run Token renewal without blocking the event loop
-            loop = asyncio.get_running_loop()
-            expired = await loop.run_in_executor(None, self.current_aws_user.check_token, False)  # type: ignore[attr-defined] # noqa: E501
-            # TODO - Investigate why using the REFRESH_TOKEN # pylint: disable=fixme
-            #  allways returns "Invalid Refresh Token"
-            if expired:
-                _LOGGER.info("Token expired, renewing tokens")
-                await self.authenticate(self.username, self.password)
+            await self._cache_flight.run(path, lambda: self.__counted_get(path))
         except Exception as ex:
-            _LOGGER.error("%s", ex)
-            raise PyPetWALKClientAWSInvalidTokens from ex
+            _LOGGER.debug("Revalidating %s failed: %r", path, ex)
+
+    async def __headers(self) -> dict:
+        if self.id_token is None and not self._store_loaded:
+            await self._auth_flight.run("load", self.__load_tokens)
+
+        now = time.time()
+        if self.id_token is None or self.access_token is None:
+            _LOGGER.info("Missing AWS Authentication, we need to authenticate before")
+            await self.__renew()
+        elif self.token_expires_at is not None and now >= self.token_expires_at:
+            _LOGGER.info("Token expired, renewing tokens")
+            await self.__renew()
+        elif (
+            self.token_expires_at is not None
+            and now >= self.token_expires_at - AWS_TOKEN_REFRESH_MARGIN
+        ):
+            # Still valid, renew in background so requests don't wait for it
+            self.__schedule_refresh()
+
+        if self.id_token is None or self.access_token is None:
+            raise PyPetWALKClientAWSInvalidTokens("No valid tokens available")
 
         headers = {
-            "Authorization": self.current_aws_user.id_token,  # type: ignore[attr-defined] # noqa: E501
-            "UserAccess": self.current_aws_user.access_token,  # type: ignore[attr-defined] # noqa: E501
+            "Authorization": self.id_token,
+            "UserAccess": self.access_token,
             "Client-Version": APP_VERSION,
         }
 
         return headers
 
+    async def __renew(self) -> None:
+        """Authenticate, closing the session if the login failed."""
+        try:
+            await self.__login()
+        except PyPetWALKClientAWSAuthenticationError:
+            await self.close()
+            raise
+
+    async def __login(self) -> None:
+        """Authenticate, sharing a running login with concurrent requests."""
+        await self._auth_flight.run(
+            "authenticate", lambda: self.authenticate(self.username, self.password)
+        )
+
+    async def __load_tokens(self) -> None:
+        """Use the tokens of the token store, if still valid."""
+        self._store_loaded = True
+        if self.token_store is None:
+            return
+
+        try:
+            tokens = await self.executor.run(self.token_store.load, self.username)
+        except Exception as ex:
+            _LOGGER.warning("Unable to load stored tokens: %r", ex)
+            return
+
+        if not tokens or not tokens.get("id_token") or not tokens.get("access_token"):
+            return
+
+        expiry = get_token_expiry(tokens["id_token"])
+        if expiry is not None and time.time() >= expiry:
+            _LOGGER.debug("Stored tokens are expired")
+            return
+
+        _LOGGER.info("Using stored AWS tokens")
+        self.set_tokens(
+            tokens["id_token"], tokens["access_token"], tokens.get("refresh_token")
+        )
+
+    async def __save_tokens(self) -> None:
+        """Store the current tokens in the token store."""
+        if (
+            self.token_store is None
+            or self.id_token is None
+            or self.access_token is None
+        ):
+            return
+
+        tokens = {"id_token": self.id_token, "access_token": self.access_token}
+        if self.refresh_token is not None:
+            tokens["refresh_token"] = self.refresh_token
+
+        try:
+            await self.executor.run(self.token_store.save, self.username, tokens)
+        except Exception as ex:
+            _LOGGER.warning("Unable to store tokens: %r", ex)
+
+    def __arm_refresh_timer(self) -> None:
+        """Renew the tokens in background shortly before they expire."""
+        self.__cancel_refresh_timer()
+        if self.token_expires_at is None:
+            return
+
+        delay = self.token_expires_at - AWS_TOKEN_REFRESH_MARGIN - time.time()
+        if delay <= 0:
+            # Already within the margin, the next request renews them
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._refresh_timer = loop.call_later(delay, self.__schedule_refresh)
+
+    def __cancel_refresh_timer(self) -> None:
+        """Cancel a pending proactive token renewal."""
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+
+    def __schedule_refresh(self) -> None:
+        """Start renewing the tokens in background, if not already running."""
+        self.__cancel_refresh_timer()
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+
+        _LOGGER.info("Token expires soon, renewing tokens in background")
+        self._refresh_task = asyncio.create_task(self.__refresh())
+
+    async def __refresh(self) -> None:
+        """Renew the tokens, keeping the current ones on failure."""
+        # TODO - Investigate why using the REFRESH_TOKEN # pylint: disable=fixme
+        #  allways returns "Invalid Refresh Token"
+        try:
+            await self.__login()
+        except PyPetWALKClientAWSAuthenticationError as ex:
+            _LOGGER.debug("Background token renewal failed: %r", ex)
+
     def __get_session(self) -> ClientSession:
         """Return current session, recreating if it was closed."""
         if self.session.closed:
@@ -0,0 +1,88 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+import time
+
+from pypetwalk.const import AWS_CACHE_STALE, AWS_CACHE_TTLS
+
+
+@dataclass
+class CachedResponse:
+    """Class that represents a cached AWS response."""
+
+    data: dict
+    fetched_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def age(self) -> float:
+        """Return the seconds since the response was fetched or revalidated."""
+        return time.monotonic() - self.fetched_at
+
+
+class ResponseCache:
+    """Class that caches AWS responses per path.
+
+    Responses younger than the TTL of their path are fresh. Until the stale
+    period is over as well, they can still be served while revalidating.
+    """
+
+    def __init__(
+        self,
+        ttls: Mapping[str, float] = AWS_CACHE_TTLS,
+        stale: float = AWS_CACHE_STALE,
+    ) -> None:
+        """Initialize ResponseCache object."""
+        self.ttls = dict(ttls)
+        self.stale = stale
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries: dict[str, CachedResponse] = {}
+
+    def get(self, path: str) -> CachedResponse | None:
+        """Return the cached response for the given path."""
+        return self._entries.get(path)
+
+    def is_fresh(self, path: str, entry: CachedResponse) -> bool:
+        """Return if the entry can be served without revalidation."""
+        return entry.age < self.ttls.get(path, 0)
+
+    def is_usable(self, path: str, entry: CachedResponse) -> bool:
+        """Return if the entry can be served while revalidating."""
+        return entry.age < self.ttls.get(path, 0) + self.stale
+
+    def conditional_headers(self, path: str) -> dict[str, str]:
+        """Return the headers to revalidate the cached response."""
+        entry = self._entries.get(path)
+        headers = {}
+        if entry is not None and entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, path: str, data: dict, headers: Mapping[str, str]) -> None:
+        """Cache the response, if the path is cacheable."""
+        if path not in self.ttls:
+            return
+
+        self._entries[path] = CachedResponse(
+            data, time.monotonic(), headers.get("ETag"), headers.get("Last-Modified")
+        )
+
+    def revalidated(self, path: str) -> CachedResponse | None:
+        """Mark the cached response as still valid and return it."""
+        entry = self._entries.get(path)
+        if entry is not None:
+            self.not_modified += 1
+            entry.fetched_at = time.monotonic()
+        return entry
+
+    def clear(self) -> None:
+        """Forget all cached responses."""
+        self._entries.clear()
@@ -0,0 +1,285 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from datetime import UTC, datetime
+import struct
+from typing import Any
+
+from .event import Event, LazyEvent
+from .pet import Pet
+from .registry import PetRegistry
+
+# Every blob starts with a magic and a version, followed by a table of all
+# strings used. Values like event_type or direction are stored as indices
+# into that table, so repeated values cost four bytes. Event blobs also
+# contain a table of their Pets, which events reference by index.
+EVENTS_MAGIC = b"PWEV"
+PETS_MAGIC = b"PWPT"
+VERSION = 1
+
+_NONE = 0xFFFFFFFF
+_NO_RFID = -(2**31)
+# The API sends an empty string for events without a learned tag
+_EMPTY_RFID = _NO_RFID + 1
+_RFID_SENTINELS: dict[Any, int] = {None: _NO_RFID, "": _EMPTY_RFID}
+_RFID_VALUES: dict[int, Any] = {_NO_RFID: None, _EMPTY_RFID: ""}
+
+_HEADER = struct.Struct("<4sB")
+_COUNT = struct.Struct("<I")
+_LENGTH = struct.Struct("<H")
+# id, date, event_type, event_source, direction, local_component_id, pet, rfid
+_EVENT = struct.Struct("<QqIIIIIi")
+# id, name, species
+_EVENT_PET = struct.Struct("<III")
+# id, name, species, config_in, config_out, created, unknown
+_PET = struct.Struct("<IIIIIq?")
+
+
+class _StringTable:
+    """Class that interns the strings of a blob."""
+
+    def __init__(self) -> None:
+        """Initialize _StringTable object."""
+        self.strings: list[str] = []
+        self._index: dict[str, int] = {}
+
+    def add(self, value: str | None) -> int:
+        """Return the index of the string, adding it if new."""
+        if value is None:
+            return _NONE
+        if not isinstance(value, str):
+            raise ValueError(f"Expected a string, got {value!r}")
+        if (index := self._index.get(value)) is None:
+            index = self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def encode(self) -> bytes:
+        """Return the encoded string table."""
+        parts = [_COUNT.pack(len(self.strings))]
+        for value in self.strings:
+            encoded = value.encode()
+            if len(encoded) > 0xFFFF:
+                raise ValueError(f"String too long to encode: {value[:20]}...")
+            parts.append(_LENGTH.pack(len(encoded)))
+            parts.append(encoded)
+        return b"".join(parts)
+
+    @staticmethod
+    def decode(data: memoryview, offset: int) -> tuple[list[Any], int]:
+        """Return the strings of the table at offset and the offset after it."""
+        (count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        strings: list[Any] = []
+        for _ in range(count):
+            (length,) = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            end = offset + length
+            strings.append(bytes(data[offset:end]).decode())
+            offset = end
+        return strings, offset
+
+
+def _encode_rfid(rfid_index: Any) -> int:
+    """Return the encoded RFID index, using a sentinel for missing ones."""
+    if rfid_index is None or rfid_index == "":
+        return _RFID_SENTINELS[rfid_index]
+    return int(rfid_index)
+
+
+def encode_events(events: Iterable[Event | LazyEvent]) -> bytes:
+    """Return the binary encoding of the events."""
+    strings = _StringTable()
+    pets: dict[str, int] = {}
+    pet_records: list[bytes] = []
+    records: list[bytes] = []
+    for event in events:
+        try:
+            pet_index = _NONE
+            if (pet := event.pet) is not None:
+                # Without a registry, every event has its own copy of the pet
+                if (pet_index := pets.get(pet.id, _NONE)) == _NONE:
+                    pet_index = pets[pet.id] = len(pet_records)
+                    pet_records.append(
+                        _EVENT_PET.pack(
+                            strings.add(pet.id),
+                            strings.add(pet.name),
+                            strings.add(pet.species),
+                        )
+                    )
+
+            records.append(
+                _EVENT.pack(
+                    int(event.id),
+                    int(event.date.timestamp()),
+                    strings.add(event.event_type),
+                    strings.add(event.event_source),
+                    strings.add(event.direction),
+                    strings.add(event.local_component_id),
+                    pet_index,
+                    _encode_rfid(event.rfid_index),
+                )
+            )
+        except (TypeError, ValueError, struct.error) as ex:
+            raise ValueError(f"Unable to encode event {event.id!r}: {ex}") from ex
+
+    return b"".join(
+        [
+            _HEADER.pack(EVENTS_MAGIC, VERSION),
+            strings.encode(),
+            _COUNT.pack(len(pet_records)),
+            *pet_records,
+            _COUNT.pack(len(records)),
+            *records,
+        ]
+    )
+
+
+def decode_events(data: bytes, registry: PetRegistry | None = None) -> list[Event]:
+    """Return the events of a binary encoding, sharing Pets via registry."""
+    view = memoryview(data)
+    try:
+        strings, offset = _StringTable.decode(view, _check_header(view, EVENTS_MAGIC))
+        strings.append(None)
+
+        pets: list[Pet] = []
+        records, offset = _records(view, offset, _EVENT_PET)
+        for pet_id, name, species in records:
+            pets.append(
+                _merge_pet(
+                    registry,
+                    _get(strings, pet_id),
+                    name=_get(strings, name),
+                    species=_get(strings, species),
+                )
+            )
+
+        events = []
+        records, offset = _records(view, offset, _EVENT)
+        for (
+            event_id,
+            date,
+            event_type,
+            source,
+            direction,
+            component,
+            pet,
+            rfid,
+        ) in records:
+            event = Event(registry=registry)
+            event.id = event_id
+            event.date = datetime.fromtimestamp(date, UTC)
+            event.event_type = _get(strings, event_type)
+            event.event_source = _get(strings, source)
+            event.direction = _get(strings, direction)
+            event.local_component_id = _get(strings, component)
+            event.pet = pets[pet] if pet != _NONE else None
+            event.rfid_index = _RFID_VALUES.get(rfid, rfid)
+            events.append(event)
+    except (IndexError, UnicodeDecodeError, struct.error) as ex:
+        raise ValueError(f"Invalid encoded events: {ex}") from ex
+
+    return events
+
+
+def encode_pets(pets: Iterable[Pet]) -> bytes:
+    """Return the binary encoding of the pets."""
+    strings = _StringTable()
+    records = []
+    for pet in pets:
+        try:
+            records.append(
+                _PET.pack(
+                    strings.add(pet.id),
+                    strings.add(pet.name),
+                    strings.add(pet.species),
+                    strings.add(pet.config_in),
+                    strings.add(pet.config_out),
+                    int(pet.created.timestamp()),
+                    pet.unknown,
+                )
+            )
+        except (TypeError, ValueError, struct.error) as ex:
+            raise ValueError(f"Unable to encode pet {pet.id!r}: {ex}") from ex
+
+    return b"".join(
+        [
+            _HEADER.pack(PETS_MAGIC, VERSION),
+            strings.encode(),
+            _COUNT.pack(len(records)),
+            *records,
+        ]
+    )
+
+
+def decode_pets(data: bytes, registry: PetRegistry | None = None) -> list[Pet]:
+    """Return the pets of a binary encoding, merged into registry if given."""
+    view = memoryview(data)
+    try:
+        strings, offset = _StringTable.decode(view, _check_header(view, PETS_MAGIC))
+        strings.append(None)
+
+        pets = []
+        records, offset = _records(view, offset, _PET)
+        for pet_id, name, species, config_in, config_out, created, unknown in records:
+            config = {
+                key: value
+                for key, value in (
+                    ("in", _get(strings, config_in)),
+                    ("out", _get(strings, config_out)),
+                )
+                if value is not None
+            }
+            pets.append(
+                _merge_pet(
+                    registry,
+                    _get(strings, pet_id),
+                    name=_get(strings, name),
+                    species=_get(strings, species),
+                    config=config or None,
+                    created=created or None,
+                    unknown=unknown,
+                )
+            )
+    except (IndexError, UnicodeDecodeError, struct.error) as ex:
+        raise ValueError(f"Invalid encoded pets: {ex}") from ex
+
+    return pets
+
+
+def _check_header(data: memoryview, magic: bytes) -> int:
+    """Raise ValueError for a foreign blob and return the offset after it."""
+    try:
+        found, version = _HEADER.unpack_from(data)
+    except struct.error as ex:
+        raise ValueError("Missing header") from ex
+    if found != magic:
+        raise ValueError(f"Expected magic {magic!r}, got {found!r}")
+    if version != VERSION:
+        raise ValueError(f"Unsupported version {version}")
+    return _HEADER.size
+
+
+def _records(
+    data: memoryview, offset: int, record: struct.Struct
+) -> tuple[Iterable[tuple], int]:
+    """Return the fixed size records at offset and the offset after them."""
+    (count,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    end = offset + count * record.size
+    if end > len(data):
+        raise struct.error(f"Expected {count} records of {record.size} bytes")
+    return record.iter_unpack(data[offset:end]), end
+
+
+def _get(strings: Sequence[Any], index: int) -> Any:
+    """Return the string with the given index, None for the None index."""
+    return strings[-1] if index == _NONE else strings[index]
+
+
+def _merge_pet(registry: PetRegistry | None, pet_id: str | None, **fields: Any) -> Pet:
+    """Return the Pet with the given data, shared via registry if given."""
+    if registry is not None:
+        return registry.merge(pet_id or "", **fields)
+    return Pet(pet_id or "", **fields)
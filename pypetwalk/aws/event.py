@@ -1,56 +1,142 @@
 """pypetwalk is a Python library to communicate with the petWALK.control module."""
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from typing import Any
 
 from pypetwalk.const import PET_SPECIES_MAPPING
 
 from .pet import Pet
+from .registry import PetRegistry
+
+
+def _parse_date(date: str) -> datetime:
+    """Return the UTC datetime of an event date."""
+    # Provided date is UTC, but format has no timezone information
+    parsed = datetime.fromisoformat(date)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=UTC)
+    return parsed.astimezone(UTC)
+
+
+def _parse_pet(pet_data: dict, registry: PetRegistry | None = None) -> Pet:
+    """Return the Pet of the event pet data, shared via registry if given."""
+    fields: dict[str, Any] = {}
+    for key, value in pet_data.items():
+        match key.lower():
+            case "id":
+                fields["pet_id"] = value
+            case "name":
+                fields["name"] = value
+            case "species":
+                if isinstance(value, int):
+                    if value not in PET_SPECIES_MAPPING:
+                        raise ValueError(f"Unknown Pet species: {value}")
+                    fields["species"] = PET_SPECIES_MAPPING[value]
+                else:
+                    fields["species"] = value
+            case _:
+                raise ValueError(f"Unknown Pet property: {key}")
+
+    if registry is not None:
+        return registry.merge(**fields)
+    return Pet(**fields)
 
 
 class Event:
     """Class that represents an AWS Event."""
 
-    _rfid_index = None
-    _direction = None
-    _local_component_id = None
-    _pet = None
+    __slots__ = (
+        "_id",
+        "_event_type",
+        "_event_source",
+        "_date",
+        "_rfid_index",
+        "_direction",
+        "_local_component_id",
+        "_pet",
+        "_registry",
+    )
+
+    _id: int
+    _event_type: str
+    _event_source: str
+    _date: datetime
+    _rfid_index: int | None
+    _direction: str | None
+    _local_component_id: str | None
+    _pet: Pet | None
+
+    def __init__(self, event: dict | None = None, registry: PetRegistry | None = None):
+        """Initialize Event Object, sharing its Pet via registry if given."""
+        self._registry = registry
+        self._rfid_index = None
+        self._direction = None
+        self._local_component_id = None
+        self._pet = None
 
-    def __init__(self, event: dict | None = None):
-        """Initialize Event Object."""
         if event is not None:
-            if event.get("id") is None:
-                raise ValueError("We expect an id for event")
-            self.id = event.get("id")  # type: ignore[assignment]
-
-            if event.get("event_type") is None:
-                raise ValueError("We expect an event_type for event")
-            self.event_type = event.get("event_type")  # type: ignore[assignment]
-
-            if event.get("event_source") is None:
-                raise ValueError("We expect an event_source for event")
-            self.event_source = event.get("event_source")  # type: ignore[assignment]
-
-            if event.get("date") is None:
-                raise ValueError("We expect an date for event")
-            self.date = event.get("date")  # type: ignore[assignment]
-
-            if event.get("properties") is not None:
-                for key, value in event.get("properties").items():  # type: ignore[union-attr] # noqa: E501
-                    match key:
-                        case "rfid_index":
-                            self.rfid_index = value
-                        case "direction":
-                            self.direction = value
-                        case "localComponentId":
-                            self.local_component_id = value
-                        case "pet":
-                            self.pet = value
-                        case _:
-                            raise ValueError(f"Unknown property: {key}")
-
-            if event.get("pet") is not None:
-                self.pet = event["pet"]
+            error = self.__load(event)
+            if error is not None:
+                raise ValueError(error)
+
+    @classmethod
+    def from_list(
+        cls,
+        events: Iterable[dict],
+        invalid: list[dict] | None = None,
+        registry: PetRegistry | None = None,
+    ) -> list[Event]:
+        """Return the Events of all valid entries, collecting the invalid ones."""
+        result = []
+        for entry in events:
+            event = cls(registry=registry)
+            try:
+                error = event.__load(entry)
+            except (AttributeError, TypeError, ValueError) as ex:
+                error = f"{ex}"
+            if error is None:
+                result.append(event)
+            elif invalid is not None:
+                invalid.append(entry)
+
+        return result
+
+    def __load(self, event: dict) -> str | None:
+        """Set all fields from the event data or return why it is invalid."""
+        if (event_id := event.get("id")) is None:
+            return "We expect an id for event"
+        if (event_type := event.get("event_type")) is None:
+            return "We expect an event_type for event"
+        if (event_source := event.get("event_source")) is None:
+            return "We expect an event_source for event"
+        if (date := event.get("date")) is None:
+            return "We expect an date for event"
+
+        self._id = event_id
+        self._event_type = event_type
+        self._event_source = event_source
+        self._date = _parse_date(date)
+
+        properties = event.get("properties")
+        if properties:
+            for key, value in properties.items():
+                if key == "rfid_index":
+                    self._rfid_index = value
+                elif key == "direction":
+                    self._direction = value
+                elif key == "localComponentId":
+                    self._local_component_id = value
+                elif key == "pet":
+                    self._pet = _parse_pet(value, self._registry)
+                else:
+                    return f"Unknown property: {key}"
+
+        if (pet := event.get("pet")) is not None:
+            self._pet = _parse_pet(pet, self._registry)
+
+        return None
 
     @property
     def id(self) -> int:
@@ -85,23 +171,11 @@ class Event:
         return self._pet
 
     @pet.setter
-    def pet(self, pet_data: dict) -> None:
-        pet = Pet()
-
-        for key in pet_data.keys():
-            match key.lower():
-                case "id":
-                    pet.id = pet_data[key]
-                case "name":
-                    pet.name = pet_data[key]
-                case "species":
-                    if isinstance(pet_data[key], int):
-                        pet.species = PET_SPECIES_MAPPING[pet_data[key]]
-                    else:
-                        pet.species = pet_data[key]
-                case _:
-                    raise ValueError(f"Unknown Pet property: {key}")
-        self._pet = pet
+    def pet(self, pet_data: dict | Pet | None) -> None:
+        if pet_data is None or isinstance(pet_data, Pet):
+            self._pet = pet_data
+        else:
+            self._pet = _parse_pet(pet_data, self._registry)
 
     @property
     def date(self) -> datetime:
@@ -109,10 +183,11 @@ class Event:
         return self._date
 
     @date.setter
-    def date(self, date: str) -> None:
-        # Provided date is UTC, but format has no timezone information
-        parsed = datetime.strptime(date, "%Y-%m-%dT%H:%M:%S")
-        self._date = parsed.replace(tzinfo=timezone.utc)
+    def date(self, date: str | datetime) -> None:
+        if isinstance(date, datetime):
+            self._date = date if date.tzinfo else date.replace(tzinfo=UTC)
+        else:
+            self._date = _parse_date(date)
 
     @property
     def rfid_index(self) -> int | None:
@@ -120,7 +195,7 @@ class Event:
         return self._rfid_index
 
     @rfid_index.setter
-    def rfid_index(self, rfid_index: int) -> None:
+    def rfid_index(self, rfid_index: int | None) -> None:
         self._rfid_index = rfid_index
 
     @property
@@ -129,7 +204,7 @@ class Event:
         return self._direction
 
     @direction.setter
-    def direction(self, direction: str) -> None:
+    def direction(self, direction: str | None) -> None:
         self._direction = direction
 
     @property
@@ -138,5 +213,102 @@ class Event:
         return self._local_component_id
 
     @local_component_id.setter
-    def local_component_id(self, local_component_id: str) -> None:
+    def local_component_id(self, local_component_id: str | None) -> None:
         self._local_component_id = local_component_id
+
+
+class LazyEvent:
+    """Class that represents an AWS Event, decoded on first access.
+
+    Fields are read from the raw event data when accessed, so unknown
+    properties are not validated like in Event.
+    """
+
+    __slots__ = ("_data", "_registry", "_date", "_pet")
+
+    _date: datetime
+    _pet: Pet | None
+
+    def __init__(self, event: dict, registry: PetRegistry | None = None):
+        """Initialize LazyEvent Object, sharing its Pet via registry if given."""
+        self._data = event
+        self._registry = registry
+
+    @classmethod
+    def from_list(
+        cls, events: Iterable[dict], registry: PetRegistry | None = None
+    ) -> list[LazyEvent]:
+        """Return a LazyEvent for every entry."""
+        return [cls(entry, registry) for entry in events]
+
+    @property
+    def raw(self) -> dict:
+        """Return the raw event data."""
+        return self._data
+
+    @property
+    def id(self) -> int:
+        """Return the event ID."""
+        return self.__required("id")  # type: ignore[no-any-return]
+
+    @property
+    def event_type(self) -> str:
+        """Return the event type."""
+        return self.__required("event_type")  # type: ignore[no-any-return]
+
+    @property
+    def event_source(self) -> str:
+        """Return the event source."""
+        return self.__required("event_source")  # type: ignore[no-any-return]
+
+    @property
+    def date(self) -> datetime:
+        """Return the event date."""
+        try:
+            return self._date
+        except AttributeError:
+            self._date = _parse_date(self.__required("date"))
+            return self._date
+
+    @property
+    def pet(self) -> Pet | None:
+        """Return the event Pet."""
+        try:
+            return self._pet
+        except AttributeError:
+            pet_data = self._data.get("pet")
+            if pet_data is None:
+                pet_data = self.__properties().get("pet")
+            self._pet = (
+                _parse_pet(pet_data, self._registry) if pet_data is not None else None
+            )
+            return self._pet
+
+    @property
+    def rfid_index(self) -> int | None:
+        """Return the event RFID Index."""
+        return self.__properties().get("rfid_index")
+
+    @property
+    def direction(self) -> str | None:
+        """Return the event direction."""
+        return self.__properties().get("direction")
+
+    @property
+    def local_component_id(self) -> str | None:
+        """Return the event local component ID."""
+        return self.__properties().get("localComponentId")
+
+    def to_event(self) -> Event:
+        """Return the fully decoded and validated Event."""
+        return Event(self._data, self._registry)
+
+    def __required(self, key: str) -> Any:
+        """Return the value of a required field."""
+        if (value := self._data.get(key)) is None:
+            raise ValueError(f"We expect an {key} for event")
+        return value
+
+    def __properties(self) -> dict:
+        """Return the event properties."""
+        return self._data.get("properties") or {}
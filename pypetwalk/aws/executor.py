@@ -0,0 +1,90 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+import logging
+from typing import Any, TypeVar
+
+from pypetwalk.const import AWS_EXECUTOR_TIMEOUT, AWS_EXECUTOR_WORKERS
+
+T = TypeVar("T")
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BlockingExecutor:
+    """Class to run blocking pycognito/boto calls isolated from other work.
+
+    Without an executor, a small thread pool is created on first use and owned
+    by this object. A timed out call keeps its thread busy until it returns,
+    but the caller no longer waits for it.
+    """
+
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        max_workers: int = AWS_EXECUTOR_WORKERS,
+        timeout: float | None = AWS_EXECUTOR_TIMEOUT,
+    ) -> None:
+        """Initialize BlockingExecutor object."""
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.queued = 0
+        self.running = 0
+        self.timeouts = 0
+        self._executor = executor
+        self._owned = executor is None
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run func in the executor and wait at most timeout seconds."""
+        loop = asyncio.get_running_loop()
+        # Only touched from the event loop, so the counters need no lock
+        state = {"started": False, "abandoned": False}
+        self.queued += 1
+
+        def started() -> None:
+            state["started"] = True
+            if not state["abandoned"]:
+                self.queued -= 1
+            self.running += 1
+
+        def finished() -> None:
+            self.running -= 1
+
+        def call() -> T:
+            loop.call_soon_threadsafe(started)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                loop.call_soon_threadsafe(finished)
+
+        try:
+            async with asyncio.timeout(self.timeout):
+                return await loop.run_in_executor(self.__get_executor(), call)
+        except TimeoutError:
+            self.timeouts += 1
+            _LOGGER.warning(
+                "Blocking call %s timed out", getattr(func, "__name__", func)
+            )
+            raise
+        finally:
+            if not state["started"]:
+                state["abandoned"] = True
+                self.queued -= 1
+
+    def shutdown(self) -> None:
+        """Shut down the owned thread pool without waiting for running calls."""
+        if self._owned and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def __get_executor(self) -> Executor:
+        """Return the executor, creating the owned thread pool if needed."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="pypetwalk-aws"
+            )
+
+        return self._executor
@@ -7,6 +7,16 @@ import datetime
 class Pet:
     """Class that represents a Pet."""
 
+    __slots__ = (
+        "_id",
+        "_name",
+        "_species",
+        "_unknown",
+        "_created",
+        "_config_in",
+        "_config_out",
+    )
+
     def __init__(
         self,
         pet_id: str = "",
@@ -0,0 +1,133 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+import asyncio
+from email.utils import parsedate_to_datetime
+import logging
+import time
+
+from pypetwalk.const import (
+    AWS_RATE_LIMIT_ACCOUNT_BURST,
+    AWS_RATE_LIMIT_ACCOUNT_RATE,
+    AWS_RATE_LIMIT_BURST,
+    AWS_RATE_LIMIT_MAX_WAIT,
+    AWS_RATE_LIMIT_RATE,
+    AWS_RATE_LIMIT_RESERVE,
+)
+from pypetwalk.exceptions import PyPetWALKRateLimited
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Class that paces requests with a refilling amount of tokens."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Initialize TokenBucket object."""
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    def refill(self) -> None:
+        """Add the tokens earned since the last refill."""
+        now = time.monotonic()
+        if now >= self.blocked_until:
+            since = max(self._updated, self.blocked_until)
+            self.tokens = min(self.burst, self.tokens + (now - since) * self.rate)
+        self._updated = now
+
+    def wait_time(self, needed: float) -> float:
+        """Return the seconds until the given amount of tokens is available."""
+        self.refill()
+        blocked = max(self.blocked_until - time.monotonic(), 0)
+        missing = max(needed - self.tokens, 0)
+        # No tokens are earned while blocked
+        return blocked + missing / self.rate
+
+
+class RateLimiter:
+    """Class that paces the AWS requests of an account.
+
+    Every request takes a token of its endpoint and of the account, which all
+    endpoints share. Low priority calls need reserve account tokens to be left
+    for high priority calls. Calls wait up to max_wait for their tokens, low
+    priority calls are also shed while the server asked to retry later.
+    """
+
+    def __init__(
+        self,
+        rate: float = AWS_RATE_LIMIT_RATE,
+        burst: int = AWS_RATE_LIMIT_BURST,
+        reserve: int = AWS_RATE_LIMIT_RESERVE,
+        max_wait: float = AWS_RATE_LIMIT_MAX_WAIT,
+        account_rate: float = AWS_RATE_LIMIT_ACCOUNT_RATE,
+        account_burst: int = AWS_RATE_LIMIT_ACCOUNT_BURST,
+    ) -> None:
+        """Initialize RateLimiter object."""
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.requests = 0
+        self.delayed = 0
+        self.shed = 0
+        self.throttled = 0
+        self.account = TokenBucket(account_rate, account_burst)
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        """Return the token bucket of the given endpoint."""
+        if endpoint not in self._buckets:
+            self._buckets[endpoint] = TokenBucket(self.rate, self.burst)
+        return self._buckets[endpoint]
+
+    async def acquire(self, endpoint: str, low_priority: bool = False) -> None:
+        """Wait until a request to the endpoint is allowed."""
+        bucket = self.bucket(endpoint)
+        needed = 1 + self.reserve if low_priority else 1
+        while (wait := max(bucket.wait_time(1), self.account.wait_time(needed))) > 0:
+            now = time.monotonic()
+            blocked = max(bucket.blocked_until, self.account.blocked_until) > now
+            if wait > self.max_wait or (low_priority and blocked):
+                self.shed += 1
+                raise PyPetWALKRateLimited(
+                    f"Request to {endpoint} shed by rate limiter", retry_after=wait
+                )
+
+            self.delayed += 1
+            _LOGGER.debug("Delaying request to %s by %.2fs", endpoint, wait)
+            await asyncio.sleep(wait)
+
+        bucket.tokens -= 1
+        self.account.tokens -= 1
+        self.requests += 1
+
+    def throttle(self, endpoint: str, retry_after: float | None) -> None:
+        """Pause the endpoint and the account after the server throttled."""
+        self.throttled += 1
+        for bucket in (self.bucket(endpoint), self.account):
+            bucket.refill()
+            bucket.tokens = 0
+            if retry_after is not None:
+                bucket.blocked_until = max(
+                    bucket.blocked_until, time.monotonic() + retry_after
+                )
+
+    @staticmethod
+    def parse_retry_after(value: str | None) -> float | None:
+        """Return the seconds of a Retry-After header value."""
+        if not value:
+            return None
+
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(retry_at.timestamp() - time.time(), 0)
@@ -0,0 +1,78 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+from pypetwalk.const import UNKNOWN_PET_ID, UNKNOWN_PET_NAME
+
+from .pet import Pet
+
+
+class PetRegistry:
+    """Class that holds one shared Pet object per pet id of a door."""
+
+    def __init__(self) -> None:
+        """Initialize PetRegistry object."""
+        self._pets: dict[str, Pet] = {}
+
+    def __len__(self) -> int:
+        """Return the number of known pets."""
+        return len(self._pets)
+
+    def get(self, pet_id: str) -> Pet | None:
+        """Return the Pet with the given id."""
+        return self._pets.get(pet_id)
+
+    def merge(
+        self,
+        pet_id: str = "",
+        name: str | None = None,
+        species: str | None = None,
+        config: dict | None = None,
+        created: int | None = None,
+        unknown: bool = False,
+        authoritative: bool = False,
+    ) -> Pet:
+        """Return the Pet with the given id, updated with the given data.
+
+        Only authoritative data, i.e. DeviceInfo, replaces known fields. Other
+        data, like historic timeline events, only fills the missing ones.
+        """
+        if not pet_id:
+            # Without an id, there is nothing to share the Pet with
+            return Pet(pet_id, name, species, config, created, unknown)
+
+        pet = self._pets.get(pet_id)
+        if pet is None:
+            pet = Pet(pet_id, name, species, config, created, unknown)
+            self._pets[pet_id] = pet
+            return pet
+
+        if name is not None and (authoritative or pet.name is None):
+            pet.name = name
+        if species is not None and (authoritative or pet.species is None):
+            pet.species = species
+        if config is not None:
+            if "in" in config and (authoritative or pet.config_in is None):
+                pet.config_in = config["in"]
+            if "out" in config and (authoritative or pet.config_out is None):
+                pet.config_out = config["out"]
+        if created is not None and (authoritative or not pet.created.timestamp()):
+            pet.set_created_from_timestamp(created)
+        if unknown:
+            pet.unknown = unknown
+
+        return pet
+
+    def merge_device_info(self, pet_data: list) -> Pet:
+        """Return the Pet of a DeviceInfo pet entry, updated with its data."""
+        return self.merge(
+            pet_id=pet_data[0],
+            name=pet_data[1],
+            species=pet_data[2],
+            config=pet_data[3],
+            created=pet_data[4],
+            authoritative=True,
+        )
+
+    def unknown(self) -> Pet:
+        """Return the Pet used for events without a known pet."""
+        return self.merge(pet_id=UNKNOWN_PET_ID, name=UNKNOWN_PET_NAME, unknown=True)
@@ -0,0 +1,84 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+class JSONArrayParser:
+    """Class that decodes the items of a JSON array while it is received.
+
+    Only the text of the item currently being received is kept, so memory
+    doesn't grow with the length of the array.
+    """
+
+    def __init__(self) -> None:
+        """Initialize JSONArrayParser object."""
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._expect = "["
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """Add the chunk and return all items completed by it."""
+        self._buffer += self._text.decode(chunk)
+        return self.__parse(final=False)
+
+    def close(self) -> list[Any]:
+        """Return the last items and raise ValueError if the array is incomplete."""
+        self._buffer += self._text.decode(b"", final=True)
+        items = self.__parse(final=True)
+        if self._expect != "" or self._buffer.strip(_WHITESPACE):
+            raise ValueError("Incomplete JSON array")
+        return items
+
+    def __parse(self, final: bool) -> list[Any]:
+        """Decode as many items as the buffer contains."""
+        items = []
+        buffer = self._buffer
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buffer) or self._expect == "":
+                break
+
+            char = buffer[pos]
+            if self._expect == "[":
+                if char != "[":
+                    raise ValueError(f"Expected a JSON array, got {char!r}")
+                self._expect = "value or ]"
+                pos += 1
+            elif char == "]" and self._expect != "value":
+                self._expect = ""
+                pos += 1
+            elif self._expect == ", or ]":
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']', got {char!r}")
+                self._expect = "value"
+                pos += 1
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                # A number is only complete once a delimiter follows, "-1" may
+                # continue as "-1.5e3" with the next chunk
+                if (
+                    not final
+                    and not isinstance(item, (dict, list, str))
+                    and (end == len(buffer) or buffer[end] not in _DELIMITERS)
+                ):
+                    break
+                items.append(item)
+                self._expect = ", or ]"
+                pos = end
+
+        self._buffer = buffer[pos:]
+        return items
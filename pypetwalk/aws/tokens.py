@@ -0,0 +1,142 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import base64
+import binascii
+from collections.abc import Iterator
+import contextlib
+import json
+import logging
+import os
+import sys
+from typing import Any
+
+if sys.platform != "win32":
+    import fcntl
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def get_token_expiry(token: str | None) -> float | None:
+    """Return the "exp" claim of a JWT without verifying it."""
+    if not token:
+        return None
+
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError, binascii.Error):
+        return None
+
+
+class TokenStore(ABC):
+    """Base class for storing Cognito tokens across restarts."""
+
+    @abstractmethod
+    def load(self, username: str) -> dict[str, str] | None:
+        """Return the stored tokens for the given username."""
+
+    @abstractmethod
+    def save(self, username: str, tokens: dict[str, str]) -> None:
+        """Store the tokens for the given username."""
+
+
+class FileTokenStore(TokenStore):
+    """Class for storing Cognito tokens in a file only readable by the owner.
+
+    If a key is given, the file is encrypted with Fernet, which requires the
+    cryptography package. Access is serialised with a lock file, so several
+    processes can share one store.
+    """
+
+    def __init__(self, path: str, key: bytes | None = None) -> None:
+        """Initialize FileTokenStore object."""
+        self.path = path
+        self.key = key
+
+    def load(self, username: str) -> dict[str, str] | None:
+        """Return the stored tokens for the given username."""
+        with self.__lock(exclusive=False):
+            return self.__read().get(username)
+
+    def save(self, username: str, tokens: dict[str, str]) -> None:
+        """Store the tokens, unless another process stored newer ones."""
+        with self.__lock(exclusive=True):
+            data = self.__read()
+            stored = data.get(username) or {}
+            if (get_token_expiry(stored.get("id_token")) or 0) > (
+                get_token_expiry(tokens.get("id_token")) or 0
+            ):
+                return
+
+            data[username] = tokens
+            self.__write(data)
+
+    @contextlib.contextmanager
+    def __lock(self, exclusive: bool) -> Iterator[None]:
+        """Lock the store against other processes."""
+        if sys.platform == "win32":
+            yield
+            return
+
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            os.close(fd)
+
+    def __read(self) -> dict[str, dict[str, str]]:
+        """Read and decrypt all stored tokens."""
+        try:
+            with open(self.path, "rb") as token_file:
+                content = token_file.read()
+        except FileNotFoundError:
+            return {}
+
+        try:
+            if self.key is not None:
+                content = self.__decrypt(content)
+            data = json.loads(content)
+        except ValueError:
+            _LOGGER.warning("Ignoring unreadable token store %s", self.path)
+            return {}
+
+        return data if isinstance(data, dict) else {}
+
+    def __write(self, data: dict[str, dict[str, str]]) -> None:
+        """Encrypt and atomically write all tokens."""
+        content = json.dumps(data).encode()
+        if self.key is not None:
+            content = self.__fernet().encrypt(content)
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as token_file:
+            token_file.write(content)
+            token_file.flush()
+            os.fsync(token_file.fileno())
+        os.replace(tmp_path, self.path)
+
+    def __decrypt(self, content: bytes) -> bytes:
+        """Decrypt the content, raising ValueError for a wrong key."""
+        # Only needed for encrypted stores, so don't import it on module load
+        from cryptography.fernet import (  # pylint: disable=import-outside-toplevel
+            InvalidToken,
+        )
+
+        try:
+            return self.__fernet().decrypt(content)  # type: ignore[no-any-return]
+        except InvalidToken as ex:
+            raise ValueError("Unable to decrypt token store") from ex
+
+    def __fernet(self) -> Any:
+        """Return the Fernet instance for the configured key."""
+        from cryptography.fernet import (  # pylint: disable=import-outside-toplevel
+            Fernet,
+        )
+
+        return Fernet(self.key)  # type: ignore[arg-type]
@@ -8,11 +8,28 @@ API_HTTP_PROTOCOL: Final = "http"
 API_REQUEST_TIMEOUT: Final = 30
 WS_PORT: Final = 1234
 WS_REQUEST_TIMEOUT: Final = 30
+WS_WIFI_SCAN_TIMEOUT: Final = 30
+WS_WIFI_SCAN_IDLE_TIMEOUT: Final = 5
+WS_UNSUPPORTED_FAILURES: Final = 3
+WS_UNSUPPORTED_RETRY_AFTER: Final = 300
 AWS_URL: Final = "https://caln02rdoj.execute-api.eu-west-1.amazonaws.com/Master"
 AWS_REQUEST_TIMEOUT: Final = 60
 AWS_USER_POOL_ID: Final = "eu-west-1_NaHCncUdX"
 AWS_CLIENT_ID: Final = "2qht0pl3vufdq8dmah5crv2e0o"
 AWS_TIMELINE_INTEVAL_DAYS: Final = 365
+AWS_TOKEN_REFRESH_MARGIN: Final = 300
+AWS_EXECUTOR_WORKERS: Final = 2
+AWS_EXECUTOR_TIMEOUT: Final = 30
+AWS_STREAM_CHUNK_SIZE: Final = 16384
+AWS_CACHE_TTLS: Final = {"update_info": 300, "notifications/settings": 300}
+AWS_CACHE_STALE: Final = 3600
+AWS_RATE_LIMIT_RATE: Final = 1.0
+AWS_RATE_LIMIT_BURST: Final = 10
+AWS_RATE_LIMIT_ACCOUNT_RATE: Final = 2.0
+AWS_RATE_LIMIT_ACCOUNT_BURST: Final = 20
+AWS_RATE_LIMIT_RESERVE: Final = 3
+AWS_RATE_LIMIT_MAX_WAIT: Final = 30
+AWS_LOW_PRIORITY_ENDPOINTS: Final = frozenset({"door_events"})
 
 WS_COMMAND_RFID_START_LEARN: Final = "RFIDStartLearn"
 WS_COMMAND_RFID_STOP_LEARN: Final = "RFIDStopLearn"
@@ -37,6 +54,33 @@ WS_COMMAND_INIT_DRIVE_START: Final = "InitDriveStart"
 
 ZIGBEE_DEFAULT_JOIN_TYPE: Final = "petWALK_ALB"
 
+# Commands which are undocumented and depend on the firmware of the door
+WS_FIRMWARE_DEPENDENT_COMMANDS: Final = frozenset(
+    {
+        WS_COMMAND_RFID_STOP_LEARN,
+        WS_COMMAND_RFID_TAG_EXISTS,
+        WS_COMMAND_ZIGBEE_UPDATE,
+        WS_COMMAND_WIFI_SCAN,
+    }
+)
+
+# Error the door answers unknown commands with
+WS_UNKNOWN_COMMAND_ERROR: Final = "unknown function"
+
+# Commands that are only available if the "clb_features" flag is enabled
+WS_FEATURE_COMMANDS: dict[str, frozenset[str]] = {
+    "zigbee": frozenset(
+        {
+            WS_COMMAND_ZIGBEE_LIST_DEVICES,
+            WS_COMMAND_ZIGBEE_REMOVE_DEVICE,
+            WS_COMMAND_ZIGBEE_JOIN_ALLOWED,
+            WS_COMMAND_ZIGBEE_NAME_DEVICE,
+            WS_COMMAND_ZIGBEE_UPDATE,
+            WS_COMMAND_ZIGBEE_JOIN_CONFIRM,
+        }
+    ),
+}
+
 API_STATE_BRIGHTNESS_SENSOR: Final = "brightnessSensor"
 API_STATE_MOTION_IN: Final = "motion_in"
 API_STATE_MOTION_OUT: Final = "motion_out"
@@ -65,6 +109,56 @@ API_STATE_MAPPING: dict[str, bool] = {
     "on": True,
 }
 
+# Bits of "clb_cfg_flags" in DeviceInfo. This layout is assumed, not verified:
+# one bit per mode from bit 0, in the order below. No /modes response and
+# DeviceInfo captured from the same door back it up yet, so prefer
+# STATE_SOURCE_API until one does and fix the bits here if needed.
+WS_CFG_FLAGS_MAPPING: dict[str, int] = {
+    API_STATE_MOTION_IN: 1 << 0,
+    API_STATE_MOTION_OUT: 1 << 1,
+    API_STATE_RFID: 1 << 2,
+    API_STATE_TIME: 1 << 3,
+    API_STATE_BRIGHTNESS_SENSOR: 1 << 4,
+}
+
+WS_STATE_MAPPING: dict[str, str] = {
+    API_STATE_DOOR: "clb_state_door_pos",
+    API_STATE_SYSTEM: "clb_state_opmode",
+}
+
+STATE_SOURCE_API: Final = "api"
+STATE_SOURCE_WS: Final = "ws"
+
+SNAPSHOT_TIMEOUT: Final = 30
+PREWARM_TIMEOUT: Final = 30
+
+WATCH_MIN_INTERVAL: Final = 5
+WATCH_MAX_INTERVAL: Final = 60
+WATCH_CHANGE_DOOR: Final = "door"
+WATCH_CHANGE_SYSTEM: Final = "system"
+WATCH_CHANGE_MODE: Final = "mode"
+WATCH_CHANGE_POWER: Final = "power"
+WATCH_CHANGE_PET: Final = "pet"
+
+FOLLOW_MIN_INTERVAL: Final = 10
+FOLLOW_MAX_INTERVAL: Final = 300
+FOLLOW_WINDOW: Final = 1
+
+PING_TIMEOUT: Final = 2
+PING_CACHE_TTL: Final = 5
+PING_FRESHNESS: Final = 30
+
+ROUTER_READ_TIMEOUT: Final = 10
+ROUTER_EWMA_WEIGHT: Final = 0.3
+ROUTER_ERROR_PENALTY: Final = 60
+ROUTER_RECOVERY_TIME: Final = 300
+
+TIMELINE_MAX_AGE: Final = 30
+
+REQUEST_LOG_RATE: Final = 10
+REQUEST_LOG_BURST: Final = 20
+REQUEST_LOG_SAMPLE_RATE: Final = 1.0
+
 API_STATE_MAPPING_DOOR_OPEN: Final = "open"
 API_STATE_MAPPING_DOOR_CLOSE: Final = "close"
 API_STATE_MAPPING_DOOR_CLOSED: Final = "closed"
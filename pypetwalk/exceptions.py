@@ -67,3 +67,20 @@ class PyPetWALKClientAWSInvalidTokens(BasePyPetWALKException):
     def __init__(self, *args: Any) -> None:
         """Init the PyPetWALKClientAWSInvalidTokens."""
         super().__init__("PyPetWALKClientAWSInvalidTokens", *args)
+
+
+class PyPetWALKUnsupportedCommand(BasePyPetWALKException):
+    """pypetwalk PyPetWALKUnsupportedCommand exception."""
+
+    def __init__(self, *args: Any) -> None:
+        """Init the PyPetWALKUnsupportedCommand."""
+        super().__init__("PyPetWALKUnsupportedCommand", *args)
+
+
+class PyPetWALKRateLimited(BasePyPetWALKException):
+    """pypetwalk PyPetWALKRateLimited exception."""
+
+    def __init__(self, *args: Any, retry_after: float | None = None) -> None:
+        """Init the PyPetWALKRateLimited."""
+        super().__init__("PyPetWALKRateLimited", *args)
+        self.retry_after = retry_after
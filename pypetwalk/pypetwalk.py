@@ -1,11 +1,17 @@
 """pypetwalk is a Python library to communicate with the petWALK.control module."""
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncGenerator, Iterable
+from concurrent.futures import Executor
+import contextlib
+from datetime import timedelta
+import functools
 import logging
 from types import TracebackType
 
 from .api import API
-from .aws import AWS, Event, Pet
+from .aws import AWS, Event, Pet, PetRegistry, TokenStore
 from .const import (
     API_METHOD_MAPPING,
     API_PORT,
@@ -22,14 +28,30 @@ from .const import (
     AWS_URL,
     AWS_USER_POOL_ID,
     EVENT_TYPE_OPEN,
+    FOLLOW_MAX_INTERVAL,
+    FOLLOW_MIN_INTERVAL,
+    PREWARM_TIMEOUT,
+    REQUEST_LOG_SAMPLE_RATE,
+    SNAPSHOT_TIMEOUT,
+    STATE_SOURCE_API,
+    STATE_SOURCE_WS,
     UNKNOWN_PET_ID,
-    UNKNOWN_PET_NAME,
+    WS_CFG_FLAGS_MAPPING,
     WS_PORT,
+    WS_STATE_MAPPING,
+    WS_WIFI_SCAN_IDLE_TIMEOUT,
+    WS_WIFI_SCAN_TIMEOUT,
 )
 from .exceptions import PyPetWALKInvalidResponse, PyPetWALKInvalidResponseValue
-from .ws import WS
+from .reachability import ReachabilityProbe
+from .requestlog import RequestLogger
+from .router import TransportRouter
+from .singleflight import SingleFlight
+from .snapshot import Snapshot, SourceResult
+from .timeline import TimelineSync
+from .watch import ChangeEvent, EventFollower, Watcher
+from .ws import WS, Capabilities
 
-logging.basicConfig(level=logging.INFO)
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -46,16 +68,64 @@ class PyPetWALK:
         aws_url: str = AWS_URL,
         aws_user_pool_id: str = AWS_USER_POOL_ID,
         aws_client_id: str = AWS_CLIENT_ID,
+        capabilities_cache_path: str | None = None,
+        state_source: str = STATE_SOURCE_API,
+        prewarm: bool = False,
+        prewarm_timeout: float = PREWARM_TIMEOUT,
+        token_store: TokenStore | None = None,
+        aws_executor: Executor | None = None,
+        request_log_sample_rate: float = REQUEST_LOG_SAMPLE_RATE,
     ) -> None:
         """Initialize pyPetWALK Class."""
-        self.websocket_client = WS(host, ws_port)
-        self.api_client = API(host, api_port)
+        self.state_source = state_source
+        self.prewarm = prewarm
+        self.prewarm_timeout = prewarm_timeout
+        self._keep_alive = False
+        self._prewarm_task: asyncio.Task | None = None
+        self._device_id: int | None = None
+        self.pet_registry = PetRegistry()
+        self.single_flight = SingleFlight()
+        self.watcher = Watcher(self)
+        self._followers: set[EventFollower] = set()
+        self.timeline = TimelineSync(self.__get_timeline)
+        self.state_router = TransportRouter(
+            [state_source]
+            + [
+                src
+                for src in (STATE_SOURCE_API, STATE_SOURCE_WS)
+                if src != state_source
+            ]
+        )
+        self.websocket_client = WS(host, ws_port, Capabilities(capabilities_cache_path))
+        self.api_client = API(
+            host,
+            api_port,
+            RequestLogger(
+                logging.getLogger(API.__module__), sample_rate=request_log_sample_rate
+            ),
+        )
         self.aws_client = AWS(
-            aws_url, aws_user_pool_id, aws_client_id, username, password
+            aws_url,
+            aws_user_pool_id,
+            aws_client_id,
+            username,
+            password,
+            token_store,
+            aws_executor,
+            request_log=RequestLogger(
+                logging.getLogger(AWS.__module__), sample_rate=request_log_sample_rate
+            ),
+        )
+        self.reachability = ReachabilityProbe(
+            host, api_port, [self.api_client, self.websocket_client]
         )
 
     async def __aenter__(self) -> PyPetWALK:
         """Start pyPetWALK class from context manager."""
+        if self.prewarm:
+            # Keep connections open until we leave the context manager
+            self._keep_alive = True
+            self._prewarm_task = asyncio.create_task(self.__prewarm())
         return self
 
     async def __aexit__(
@@ -69,9 +139,49 @@ class PyPetWALK:
 
     async def disconnect(self) -> None:
         """Disconnect all clients."""
+        await self.watcher.stop()
+        if self._prewarm_task is not None:
+            self._prewarm_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._prewarm_task
+            self._prewarm_task = None
+        self._keep_alive = False
         await self.websocket_client.close()
         await self.api_client.close()
-        await self.aws_client.close()
+        await self.aws_client.disconnect()
+
+    async def __prewarm(self) -> None:
+        """Connect and authenticate all clients concurrently."""
+        try:
+            async with asyncio.timeout(self.prewarm_timeout):
+                results = await asyncio.gather(
+                    self.api_client.get_modes(),
+                    self.websocket_client.device_info(),
+                    self.aws_client.get_aws_update_info(),
+                    return_exceptions=True,
+                )
+        except TimeoutError:
+            _LOGGER.debug(
+                "Prewarming did not finish in %s seconds", self.prewarm_timeout
+            )
+            return
+
+        for result in results:
+            if isinstance(result, BaseException):
+                _LOGGER.debug("Prewarming failed: %r", result)
+
+    async def __release(self, client: API | WS | AWS) -> None:
+        """Close the client session, unless it is kept alive or still in use."""
+        if not self._keep_alive and not client.in_flight:
+            await client.close()
+
+    async def ping(self) -> float:
+        """Open a TCP connection to the door and return the time it took."""
+        return await self.reachability.ping()
+
+    async def is_reachable(self) -> bool:
+        """Return if the door is reachable, cached for a short time."""
+        return await self.reachability.is_reachable()
 
     async def get_api_data(self) -> dict[str, bool]:
         """Get all Data from Local API."""
@@ -88,28 +198,107 @@ class PyPetWALK:
 
         return result
 
+    async def get_ws_data(self) -> dict[str, bool]:
+        """Get all Data from a single Websocket DeviceInfo call."""
+        device_info = await self.get_device_info()
+        try:
+            info = device_info["responses"][0]["DeviceInfo"][0]
+            flags = int(info["clb_cfg_flags"])
+
+            result = {
+                key: bool(flags & bit) for key, bit in WS_CFG_FLAGS_MAPPING.items()
+            }
+            for key, field in WS_STATE_MAPPING.items():
+                if info[field] in API_STATE_MAPPING:
+                    result[key] = API_STATE_MAPPING[info[field]]
+
+            return result
+        except (IndexError, KeyError, TypeError, ValueError) as ex:
+            raise PyPetWALKInvalidResponse from ex
+
+    async def get_data(self) -> dict[str, bool]:
+        """Get all Data from the configured state source."""
+        if self.state_source == STATE_SOURCE_WS:
+            return await self.get_ws_data()
+
+        return await self.get_api_data()
+
     async def get_modes(self) -> dict[str, bool]:
         """Return the Modes for our Door."""
+        return await self.single_flight.run("get_modes", self.__get_modes)
+
+    async def __get_modes(self) -> dict[str, bool]:
+        """Request the Modes for our Door."""
         try:
             return await self.api_client.get_modes()
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def get_states(self) -> dict[str, str]:
         """Return the States for our Door."""
+        return await self.single_flight.run("get_states", self.__get_states)
+
+    async def __get_states(self) -> dict[str, str]:
+        """Request the States for our Door."""
         try:
             return await self.api_client.get_states()
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
+
+    async def snapshot(
+        self, door_id: int | None = None, timeout: float = SNAPSHOT_TIMEOUT
+    ) -> Snapshot:
+        """Fetch state from all sources concurrently within timeout seconds."""
+        deadline = asyncio.get_running_loop().time() + timeout
+
+        async def fetch_pet_status() -> dict[str, Event]:
+            device_id = door_id
+            if device_id is None:
+                # Reuse the concurrently fetched update info for the Device ID
+                update_info = await aws_update_info
+                if update_info.error is not None:
+                    raise update_info.error
+                device_id = self.__get_device_id_from_update_info(
+                    update_info.data  # type: ignore[arg-type]
+                )
+            return await self.get_pet_status(device_id)
+
+        async with asyncio.TaskGroup() as group:
+            state = group.create_task(SourceResult.fetch(self.get_data, deadline))
+            device_info = group.create_task(
+                SourceResult.fetch(self.get_device_info, deadline)
+            )
+            aws_update_info = group.create_task(
+                SourceResult.fetch(self.get_aws_update_info, deadline)
+            )
+            pet_status = group.create_task(
+                SourceResult.fetch(fetch_pet_status, deadline)
+            )
+
+        return Snapshot(
+            state=state.result(),
+            device_info=device_info.result(),
+            aws_update_info=aws_update_info.result(),
+            pet_status=pet_status.result(),
+        )
 
     async def get_device_id(self) -> int:
         """Return the Device ID for our Door."""
+        if self._device_id is not None:
+            return self._device_id
+
+        update_info = await self.get_aws_update_info()
+        return self.__get_device_id_from_update_info(update_info)
+
+    def __get_device_id_from_update_info(self, update_info: dict) -> int:
+        """Return and remember the Device ID contained in the AWS update info."""
         try:
-            update_info = await self.get_aws_update_info()
-            return int(update_info["update_states"][0]["deviceId"])
+            self._device_id = int(update_info["update_states"][0]["deviceId"])
         except (IndexError, KeyError) as ex:
             raise PyPetWALKInvalidResponse from ex
 
+        return self._device_id
+
     async def get_device_name(self) -> str:
         """Return the Device Name for our Door."""
         try:
@@ -147,24 +336,10 @@ class PyPetWALK:
             for pet in device_info["responses"][0]["DeviceInfo"][0]["pets"]:
                 if pet[1] is None:
                     continue
-                pets.append(
-                    Pet(
-                        pet_id=pet[0],
-                        name=pet[1],
-                        species=pet[2],
-                        config=pet[3],
-                        created=pet[4],
-                    )
-                )
+                pets.append(self.pet_registry.merge_device_info(pet))
 
             if include_unknown:
-                pets.append(
-                    Pet(
-                        pet_id=UNKNOWN_PET_ID,
-                        name=UNKNOWN_PET_NAME,
-                        unknown=True,
-                    )
-                )
+                pets.append(self.pet_registry.unknown())
 
             return pets
         except (IndexError, KeyError) as ex:
@@ -174,23 +349,22 @@ class PyPetWALK:
         """Return current Pet's status."""
         timeline = await self.get_timeline(door_id, 1)
 
+        invalid: list[dict] = []
         status: dict[str, Event] = {}
-        for entry in timeline:
-            try:
-                event = Event(entry)
-                if event.event_type != EVENT_TYPE_OPEN:
-                    continue
+        for event in Event.from_list(timeline, invalid, self.pet_registry):
+            if event.event_type != EVENT_TYPE_OPEN:
+                continue
 
-                if event.pet is not None:
-                    pet_id = event.pet.id
-                else:
-                    pet_id = UNKNOWN_PET_ID
+            if event.pet is not None:
+                pet_id = event.pet.id
+            else:
+                pet_id = UNKNOWN_PET_ID
 
-                if pet_id not in status or status[pet_id].date < event.date:
-                    status[pet_id] = event
+            if pet_id not in status or status[pet_id].date < event.date:
+                status[pet_id] = event
 
-            except ValueError:
-                _LOGGER.debug("Skipping invalid event data %s", entry)
+        if invalid:
+            _LOGGER.debug("Skipping %s invalid events: %s", len(invalid), invalid)
 
         return status
 
@@ -199,98 +373,113 @@ class PyPetWALK:
         try:
             return await self.set_state(API_STATE_BRIGHTNESS_SENSOR, state)
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def get_brightness_sensor(self) -> bool:
         """Get current value for brightness sensor."""
         try:
             return await self.__api_get_state(API_STATE_BRIGHTNESS_SENSOR)
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def set_motion_in(self, state: bool) -> bool:
         """Set new value for 'motion in' mode."""
         try:
             return await self.set_state(API_STATE_MOTION_IN, state)
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def get_motion_in(self) -> bool:
         """Get value for the 'motion in' mode."""
         try:
             return await self.__api_get_state(API_STATE_MOTION_IN)
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def set_motion_out(self, state: bool) -> bool:
         """Set new value for 'motion out' mode."""
         try:
             return await self.set_state(API_STATE_MOTION_OUT, state)
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def get_motion_out(self) -> bool:
         """Get value for the 'motion out' mode."""
         try:
             return await self.__api_get_state(API_STATE_MOTION_OUT)
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def set_rfid(self, state: bool) -> bool:
         """Set new value for rfid mode."""
         try:
             return await self.set_state(API_STATE_RFID, state)
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def get_rfid(self) -> bool:
         """Get value for the rfid mode."""
         try:
             return await self.__api_get_state(API_STATE_RFID)
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def set_time(self, state: bool) -> bool:
         """Set new value for time mode."""
         try:
             return await self.set_state(API_STATE_TIME, state)
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def get_time(self) -> bool:
         """Get value for the time mode."""
         try:
             return await self.__api_get_state(API_STATE_TIME)
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def set_door_state(self, state: bool) -> bool:
         """Open or closes petWALK door."""
         try:
             return await self.set_state(API_STATE_DOOR, state)
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def get_door_state(self) -> bool:
         """Get the current door state."""
-        try:
-            return await self.__api_get_state(API_STATE_DOOR)
-        finally:
-            await self.api_client.close()
+        return await self.__read_state(API_STATE_DOOR)
 
     async def set_system_state(self, state: bool) -> bool:
         """Turn petWALK on or off."""
         try:
             return await self.set_state(API_STATE_SYSTEM, state)
         finally:
-            await self.api_client.close()
+            await self.__release(self.api_client)
 
     async def get_system_state(self) -> bool:
         """Get current petWALK system state."""
-        try:
-            return await self.__api_get_state(API_STATE_SYSTEM)
-        finally:
-            await self.api_client.close()
+        return await self.__read_state(API_STATE_SYSTEM)
+
+    async def __read_state(self, param: str) -> bool:
+        """Read state from the healthiest transport, falling back to the other."""
+
+        async def api_read() -> bool:
+            try:
+                return await self.__api_get_state(param)
+            finally:
+                await self.__release(self.api_client)
+
+        async def ws_read() -> bool:
+            data = await self.get_ws_data()
+            if param not in data:
+                raise PyPetWALKInvalidResponse(f"Invalid Response {param} not found")
+            return data[param]
+
+        result = await self.state_router.read(
+            {STATE_SOURCE_API: api_read, STATE_SOURCE_WS: ws_read}
+        )
+        _LOGGER.debug("State %s read via %s", param, self.state_router.last_transport)
+        return result
 
     async def __api_get_state(self, param: str) -> bool:
         """Call API method to get the request mode/state."""
@@ -323,34 +512,116 @@ class PyPetWALK:
             await getattr(self.api_client, method)(param, value)
             return True
         finally:
-            await self.api_client.close()
+            self.watcher.notify_activity()
+            for follower in self._followers:
+                follower.notify_activity()
+            await self.__release(self.api_client)
+
+    async def watch(
+        self, kinds: Iterable[str] | None = None, door_id: int | None = None
+    ) -> AsyncGenerator[ChangeEvent, None]:
+        """Yield changes of the door, pet changes require the door_id."""
+        if door_id is not None:
+            self.watcher.door_id = door_id
+        async with contextlib.aclosing(self.watcher.watch(kinds)) as changes:
+            async for change in changes:
+                yield change
+
+    async def follow_events(
+        self,
+        door_id: int | None = None,
+        min_interval: float = FOLLOW_MIN_INTERVAL,
+        max_interval: float = FOLLOW_MAX_INTERVAL,
+    ) -> AsyncGenerator[Event, None]:
+        """Yield new timeline events of the door as they happen."""
+        if door_id is None:
+            door_id = await self.get_device_id()
+
+        follower = EventFollower(self, door_id, min_interval, max_interval)
+        self._followers.add(follower)
+        try:
+            async with contextlib.aclosing(follower.follow()) as events:
+                async for event in events:
+                    yield event
+        finally:
+            self._followers.discard(follower)
 
     async def get_device_info(self) -> dict:
         """Get current device information."""
+        return await self.single_flight.run("get_device_info", self.__get_device_info)
+
+    async def __get_device_info(self) -> dict:
+        """Request current device information."""
         try:
             return await self.websocket_client.device_info()
         finally:
-            await self.websocket_client.close()
+            await self.__release(self.websocket_client)
+
+    async def scan_wifi(
+        self,
+        timeout: float = WS_WIFI_SCAN_TIMEOUT,
+        idle_timeout: float = WS_WIFI_SCAN_IDLE_TIMEOUT,
+    ) -> AsyncGenerator[dict, None]:
+        """Yield Wifi networks as soon as the door reports them."""
+        try:
+            async with contextlib.aclosing(
+                self.websocket_client.scan_wifi(timeout, idle_timeout)
+            ) as networks:
+                async for network in networks:
+                    yield network
+        finally:
+            await self.__release(self.websocket_client)
 
     async def get_aws_update_info(self) -> dict:
         """Get Update Infos from AWS."""
         try:
             return await self.aws_client.get_aws_update_info()
         finally:
-            await self.aws_client.close()
+            await self.__release(self.aws_client)
 
     async def get_notification_settings(self) -> dict:
         """Get Notification Settings from AWS."""
         try:
             return await self.aws_client.get_notification_settings()
         finally:
-            await self.aws_client.close()
+            await self.__release(self.aws_client)
 
     async def get_timeline(
+        self, door_id: int, interval_days: float = AWS_TIMELINE_INTEVAL_DAYS
+    ) -> list[dict]:
+        """Get Timeline for specific door_id and interval_days, oldest first.
+
+        Only events missing in the local timeline are requested from AWS.
+        """
+        return await self.single_flight.run(
+            ("get_timeline", door_id, interval_days),
+            functools.partial(
+                self.timeline.get, door_id, timedelta(days=interval_days)
+            ),
+        )
+
+    async def iter_timeline(
         self, door_id: int, interval_days: int = AWS_TIMELINE_INTEVAL_DAYS
-    ) -> dict:
-        """Get Timeline for specific door_id and interval_days from AWS."""
+    ) -> AsyncGenerator[Event, None]:
+        """Yield the Events of the timeline without loading the whole response."""
+        try:
+            async with contextlib.aclosing(
+                self.aws_client.iter_timeline(door_id, interval_days, self.pet_registry)
+            ) as events:
+                async for event in events:
+                    yield event
+        finally:
+            await self.__release(self.aws_client)
+
+    async def backfill_timeline(
+        self, door_id: int, days: int = AWS_TIMELINE_INTEVAL_DAYS
+    ) -> list[dict]:
+        """Fetch the last days of the timeline with a single request."""
+        return await self.timeline.backfill(door_id, days)
+
+    async def __get_timeline(self, door_id: int, interval_days: int) -> dict:
+        """Request Timeline for specific door_id and interval_days from AWS."""
         try:
             return await self.aws_client.get_timeline(door_id, interval_days)
         finally:
-            await self.aws_client.close()
+            await self.__release(self.aws_client)
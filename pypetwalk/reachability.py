@@ -0,0 +1,107 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Sequence
+import contextlib
+import logging
+import time
+from typing import Protocol
+
+from .const import PING_CACHE_TTL, PING_FRESHNESS, PING_TIMEOUT
+from .exceptions import PyPetWALKClientConnectionError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RequestTracker(Protocol):
+    """Protocol for clients tracking the time of their last requests."""
+
+    last_success: float | None
+    last_failure: float | None
+
+
+class ReachabilityProbe:
+    """Class to check cheaply if a door is reachable."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        clients: Sequence[RequestTracker] = (),
+        timeout: float = PING_TIMEOUT,
+        cache_ttl: float = PING_CACHE_TTL,
+        freshness: float = PING_FRESHNESS,
+    ) -> None:
+        """Initialize ReachabilityProbe object."""
+        self.host = host
+        self.port = port
+        self.clients = clients
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.freshness = freshness
+        self.probes = 0
+        self._reachable: bool | None = None
+        self._checked_at = 0.0
+        self._probe_task: asyncio.Task | None = None
+
+    async def ping(self) -> float:
+        """Open a TCP connection to the door and return the time it took."""
+        start = time.monotonic()
+        self.probes += 1
+        try:
+            async with asyncio.timeout(self.timeout):
+                _, writer = await asyncio.open_connection(self.host, self.port)
+        except (OSError, TimeoutError) as ex:
+            _LOGGER.debug("Ping to %s:%s failed: %r", self.host, self.port, ex)
+            raise PyPetWALKClientConnectionError(ex) from ex
+
+        elapsed = time.monotonic() - start
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+
+        return elapsed
+
+    async def is_reachable(self) -> bool:
+        """Return if the door is reachable, using the cheapest signal available."""
+        now = time.monotonic()
+        if self._reachable is not None and now - self._checked_at < self.cache_ttl:
+            return self._reachable
+
+        if self.__recently_successful(now):
+            return self.__remember(True)
+
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self.__probe())
+
+        # Shield the probe, so a cancelled caller doesn't cancel it for the others
+        return await asyncio.shield(self._probe_task)
+
+    def __recently_successful(self, now: float) -> bool:
+        """Return if a client had a successful request within freshness."""
+        for client in self.clients:
+            if (
+                client.last_success is None
+                or now - client.last_success > self.freshness
+            ):
+                continue
+            if client.last_failure is None or client.last_failure < client.last_success:
+                return True
+
+        return False
+
+    async def __probe(self) -> bool:
+        """Check reachability with a TCP connect."""
+        try:
+            await self.ping()
+        except PyPetWALKClientConnectionError:
+            return self.__remember(False)
+
+        return self.__remember(True)
+
+    def __remember(self, reachable: bool) -> bool:
+        """Cache the given reachability result."""
+        self._reachable = reachable
+        self._checked_at = time.monotonic()
+        return reachable
@@ -0,0 +1,72 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+import logging
+import random
+import time
+from typing import Any
+
+from .const import REQUEST_LOG_BURST, REQUEST_LOG_RATE, REQUEST_LOG_SAMPLE_RATE
+
+
+class RequestLogger:
+    """Class for cheap, rate limited and optionally sampled request logs.
+
+    Nothing is formatted unless the logger is enabled for the level. The
+    request details are attached to the record as the "request" attribute,
+    so structured log handlers can use them without parsing the message.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        level: int = logging.DEBUG,
+        rate: float = REQUEST_LOG_RATE,
+        burst: int = REQUEST_LOG_BURST,
+        sample_rate: float = REQUEST_LOG_SAMPLE_RATE,
+    ) -> None:
+        """Initialize RequestLogger object."""
+        self.logger = logger
+        self.level = level
+        self.rate = rate
+        self.burst = burst
+        self.sample_rate = sample_rate
+        self.suppressed = 0
+        self.sampled_out = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def log(self, transport: str, method: str, path: str, **fields: Any) -> None:
+        """Log a request, if enabled, sampled and within the rate limit."""
+        if not self.logger.isEnabledFor(self.level):
+            return
+
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return
+
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens < 1:
+            self.suppressed += 1
+            return
+        self._tokens -= 1
+
+        request: dict[str, Any] = {
+            "transport": transport,
+            "method": method,
+            "path": path,
+        }
+        request.update(fields)
+        if self.suppressed:
+            request["suppressed"] = self.suppressed
+            self.suppressed = 0
+        self.logger.log(
+            self.level,
+            "Request %s %s %s",
+            transport,
+            method,
+            path,
+            extra={"request": request},
+        )
@@ -0,0 +1,105 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+import time
+from typing import TypeVar
+
+from aiohttp import ClientError
+
+from .const import (
+    ROUTER_ERROR_PENALTY,
+    ROUTER_EWMA_WEIGHT,
+    ROUTER_READ_TIMEOUT,
+    ROUTER_RECOVERY_TIME,
+)
+from .exceptions import BasePyPetWALKException
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class TransportHealth:
+    """Class that keeps latency and error statistics of a transport."""
+
+    def __init__(self, name: str) -> None:
+        """Initialize TransportHealth object."""
+        self.name = name
+        self.latency: float | None = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.last_error: float | None = None
+
+    def record_success(self, latency: float) -> None:
+        """Record a successful request with the given latency in seconds."""
+        self.requests += 1
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += ROUTER_EWMA_WEIGHT * (latency - self.latency)
+        self.error_rate -= ROUTER_EWMA_WEIGHT * self.error_rate
+
+    def record_error(self) -> None:
+        """Record a failed request."""
+        self.requests += 1
+        self.errors += 1
+        self.error_rate += ROUTER_EWMA_WEIGHT * (1.0 - self.error_rate)
+        self.last_error = time.monotonic()
+
+    @property
+    def score(self) -> float:
+        """Return the expected cost of a request, lower is better."""
+        penalty = 0.0
+        if self.last_error is not None:
+            # Errors are forgotten over time, so a recovered transport is retried
+            age = time.monotonic() - self.last_error
+            penalty = self.error_rate * max(0.0, 1.0 - age / ROUTER_RECOVERY_TIME)
+
+        return (self.latency or 0.0) + penalty * ROUTER_ERROR_PENALTY
+
+
+class TransportRouter:
+    """Class that sends reads to the healthiest transport available."""
+
+    def __init__(
+        self, transports: list[str], timeout: float = ROUTER_READ_TIMEOUT
+    ) -> None:
+        """Initialize TransportRouter object."""
+        self.timeout = timeout
+        self.health = {name: TransportHealth(name) for name in transports}
+        self.last_transport: str | None = None
+
+    def order(self) -> list[str]:
+        """Return the transports sorted from healthiest to least healthy."""
+        # sorted() is stable, so the configured order wins on ties
+        return sorted(self.health, key=lambda name: self.health[name].score)
+
+    async def read(self, readers: dict[str, Callable[[], Awaitable[T]]]) -> T:
+        """Call the reader of the healthiest transport, falling back on errors."""
+        last_error: BaseException | None = None
+        for name in self.order():
+            if name not in readers:
+                continue
+
+            health = self.health[name]
+            start = time.monotonic()
+            try:
+                async with asyncio.timeout(self.timeout):
+                    result = await readers[name]()
+            except (BasePyPetWALKException, ClientError, TimeoutError) as ex:
+                _LOGGER.debug("Transport %s failed, trying next one: %r", name, ex)
+                health.record_error()
+                last_error = ex
+                continue
+
+            health.record_success(time.monotonic() - start)
+            self.last_transport = name
+            return result
+
+        if last_error is None:
+            raise ValueError("No reader available for any transport")
+        raise last_error
@@ -0,0 +1,45 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Class that collapses concurrent identical calls into a single one."""
+
+    def __init__(self) -> None:
+        """Initialize SingleFlight object."""
+        self.calls = 0
+        self.collapsed = 0
+        self._in_flight: dict[Hashable, asyncio.Future[Any]] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Return if a call for the given key is currently running."""
+        return key in self._in_flight
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Run func, or wait for the running call with the same key."""
+        future = self._in_flight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self.__done(key, done))
+        else:
+            self.collapsed += 1
+
+        # Shield the call, so a cancelled caller doesn't cancel it for the others
+        return await asyncio.shield(future)
+
+    def __done(self, key: Hashable, future: asyncio.Future[Any]) -> None:
+        """Forget the finished call."""
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+        # Mark the exception as retrieved, even if all callers were cancelled
+        if not future.cancelled():
+            future.exception()
@@ -0,0 +1,84 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+import logging
+import time
+from typing import Generic, TypeVar
+
+from .aws import Event
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class SourceResult(Generic[T]):
+    """Class that represents the result of a single source of a Snapshot."""
+
+    data: T | None = None
+    error: BaseException | None = None
+    fetched_at: datetime | None = None
+    duration: float | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Return if the source delivered data."""
+        return self.error is None and self.fetched_at is not None
+
+    @classmethod
+    async def fetch(
+        cls, func: Callable[[], Awaitable[T]], deadline: float
+    ) -> SourceResult[T]:
+        """Run func until deadline and store its result or error."""
+        start = time.monotonic()
+        try:
+            async with asyncio.timeout_at(deadline):
+                data = await func()
+        except Exception as ex:
+            _LOGGER.debug("Snapshot source failed: %r", ex)
+            return cls(error=ex, duration=time.monotonic() - start)
+
+        return cls(
+            data=data,
+            fetched_at=datetime.now(UTC),
+            duration=time.monotonic() - start,
+        )
+
+
+@dataclass
+class Snapshot:
+    """Class that represents the state of a door from all sources."""
+
+    state: SourceResult[dict[str, bool]] = field(default_factory=SourceResult)
+    device_info: SourceResult[dict] = field(default_factory=SourceResult)
+    aws_update_info: SourceResult[dict] = field(default_factory=SourceResult)
+    pet_status: SourceResult[dict[str, Event]] = field(default_factory=SourceResult)
+
+    @property
+    def sources(self) -> dict[str, SourceResult]:
+        """Return all sources by name."""
+        return {
+            "state": self.state,
+            "device_info": self.device_info,
+            "aws_update_info": self.aws_update_info,
+            "pet_status": self.pet_status,
+        }
+
+    @property
+    def complete(self) -> bool:
+        """Return if all sources delivered data."""
+        return all(source.ok for source in self.sources.values())
+
+    @property
+    def errors(self) -> dict[str, BaseException]:
+        """Return the errors of all failed sources."""
+        return {
+            name: source.error
+            for name, source in self.sources.items()
+            if source.error is not None
+        }
@@ -0,0 +1,149 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+import logging
+import math
+from typing import Any
+
+from .aws.event import _parse_date
+from .const import AWS_TIMELINE_INTEVAL_DAYS, TIMELINE_MAX_AGE
+from .exceptions import PyPetWALKInvalidResponse
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class DoorTimeline:
+    """Class that holds the already fetched timeline of a door."""
+
+    events: dict[int, tuple[datetime, dict]] = field(default_factory=dict)
+    covered_from: datetime | None = None
+    synced_at: datetime | None = None
+    newest_id: int | None = None
+    newest_date: datetime | None = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def merge(self, entries: list[dict]) -> int:
+        """Add the entries not known yet and return how many were added."""
+        added = 0
+        for entry in entries:
+            try:
+                event_id = int(entry["id"])
+                date = _parse_date(entry["date"])
+            except (KeyError, TypeError, ValueError):
+                _LOGGER.debug("Skipping invalid event data %s", entry)
+                continue
+
+            if event_id not in self.events:
+                added += 1
+            self.events[event_id] = (date, entry)
+            if self.newest_date is None or date > self.newest_date:
+                self.newest_id, self.newest_date = event_id, date
+
+        return added
+
+    def prune(self, before: datetime) -> None:
+        """Forget all events older than before."""
+        self.events = {
+            event_id: event
+            for event_id, event in self.events.items()
+            if event[0] >= before
+        }
+        if self.covered_from is not None and self.covered_from < before:
+            self.covered_from = before
+
+
+class TimelineSync:
+    """Class that keeps a local copy of the timeline and only fetches the gap.
+
+    The AWS API only knows trailing windows of whole days, so a sync requests
+    the smallest intervalDays that reaches back to the previous sync.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int, int], Awaitable[Any]],
+        max_age: float = TIMELINE_MAX_AGE,
+        max_days: int = AWS_TIMELINE_INTEVAL_DAYS,
+    ) -> None:
+        """Initialize TimelineSync object."""
+        self.fetch = fetch
+        self.max_age = max_age
+        self.max_days = max_days
+        self.fetches = 0
+        self._doors: dict[int, DoorTimeline] = {}
+
+    def door(self, door_id: int) -> DoorTimeline:
+        """Return the local timeline of the given door."""
+        return self._doors.setdefault(door_id, DoorTimeline())
+
+    async def get(
+        self, door_id: int, interval: timedelta, max_age: float | None = None
+    ) -> list[dict]:
+        """Return all events of the last interval, oldest first.
+
+        If given, max_age overrides how old the last sync may be.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        door = self.door(door_id)
+        async with door.lock:
+            now = datetime.now(UTC)
+            # The API serves at most max_days, so never ask for more
+            start = max(now - interval, now - timedelta(days=self.max_days))
+            if door.covered_from is None or start < door.covered_from:
+                days = math.ceil((now - start) / timedelta(days=1))
+                await self.__sync(door_id, door, max(days, 1), now)
+            else:
+                synced_at = door.synced_at or door.covered_from
+                if (now - synced_at).total_seconds() > max_age:
+                    gap = math.ceil((now - synced_at) / timedelta(days=1))
+                    await self.__sync(door_id, door, max(gap, 1), now)
+
+        return self.__events_since(door, start)
+
+    async def backfill(
+        self, door_id: int, days: int = AWS_TIMELINE_INTEVAL_DAYS
+    ) -> list[dict]:
+        """Fetch the last days and return all events, oldest first.
+
+        The AWS API only knows trailing windows ending now, not ranges, so a
+        long history can't be split into windows or resumed part way. It is
+        fetched with a single request instead, regardless of what is cached.
+        """
+        door = self.door(door_id)
+        async with door.lock:
+            now = datetime.now(UTC)
+            await self.__sync(door_id, door, days, now)
+
+        return self.__events_since(door, now - timedelta(days=days))
+
+    @staticmethod
+    def __events_since(door: DoorTimeline, start: datetime) -> list[dict]:
+        """Return the events of the door since start, oldest first."""
+        return [
+            entry
+            for date, entry in sorted(door.events.values(), key=lambda e: e[0])
+            if start <= date
+        ]
+
+    async def __sync(
+        self, door_id: int, door: DoorTimeline, days: int, now: datetime
+    ) -> None:
+        """Fetch the last days and merge them into the local timeline."""
+        self.fetches += 1
+        entries = await self.fetch(door_id, days)
+        if not isinstance(entries, list):
+            raise PyPetWALKInvalidResponse(f"Unexpected timeline {entries!r}")
+
+        added = door.merge(entries)
+        _LOGGER.debug("Synced %s days of door %s, %s new events", days, door_id, added)
+
+        covered_from = now - timedelta(days=days)
+        if door.covered_from is None or covered_from < door.covered_from:
+            door.covered_from = covered_from
+        door.synced_at = now
+        door.prune(now - timedelta(days=self.max_days))
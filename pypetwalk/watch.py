@@ -0,0 +1,269 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncGenerator, Iterable
+import contextlib
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+import logging
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import ClientError
+
+from .aws import Event
+from .const import (
+    API_STATE_DOOR,
+    API_STATE_SYSTEM,
+    FOLLOW_MAX_INTERVAL,
+    FOLLOW_MIN_INTERVAL,
+    FOLLOW_WINDOW,
+    WATCH_CHANGE_DOOR,
+    WATCH_CHANGE_MODE,
+    WATCH_CHANGE_PET,
+    WATCH_CHANGE_POWER,
+    WATCH_CHANGE_SYSTEM,
+    WATCH_MAX_INTERVAL,
+    WATCH_MIN_INTERVAL,
+)
+from .exceptions import BasePyPetWALKException
+
+if TYPE_CHECKING:
+    from .pypetwalk import PyPetWALK
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """Class that represents a change of the door state."""
+
+    kind: str
+    key: str
+    old: Any
+    new: Any
+    timestamp: datetime = field(default_factory=lambda: datetime.now(UTC))
+
+
+class Watcher:
+    """Class that polls a door once and fans out changes to all subscribers."""
+
+    def __init__(
+        self,
+        client: PyPetWALK,
+        min_interval: float = WATCH_MIN_INTERVAL,
+        max_interval: float = WATCH_MAX_INTERVAL,
+    ) -> None:
+        """Initialize Watcher object."""
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.door_id: int | None = None
+        self.polls = 0
+        self._state: dict[tuple[str, str], Any] | None = None
+        self._subscribers: list[
+            tuple[asyncio.Queue[ChangeEvent | None], frozenset[str] | None]
+        ] = []
+        self._activity = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def watch(
+        self, kinds: Iterable[str] | None = None
+    ) -> AsyncGenerator[ChangeEvent, None]:
+        """Yield all changes of the given kinds, or all changes if None."""
+        queue: asyncio.Queue[ChangeEvent | None] = asyncio.Queue()
+        subscriber = (queue, frozenset(kinds) if kinds is not None else None)
+        self._subscribers.append(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.__run())
+
+        try:
+            while (change := await queue.get()) is not None:
+                yield change
+        finally:
+            self._subscribers.remove(subscriber)
+            if not self._subscribers:
+                await self.stop()
+
+    def notify_activity(self) -> None:
+        """Poll faster, e.g. after a command was sent to the door."""
+        self.interval = self.min_interval
+        self._activity.set()
+
+    async def stop(self) -> None:
+        """Stop the internal poller and end all subscriptions."""
+        for queue, _ in self._subscribers:
+            queue.put_nowait(None)
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self._state = None
+
+    async def __run(self) -> None:
+        """Poll the door until there are no more subscribers."""
+        self.interval = self.min_interval
+        while True:
+            self._activity.clear()
+            changes = await self.__poll()
+            if changes:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * 2, self.max_interval)
+
+            for queue, kinds in self._subscribers:
+                for change in changes:
+                    if kinds is None or change.kind in kinds:
+                        queue.put_nowait(change)
+
+            with contextlib.suppress(TimeoutError):
+                async with asyncio.timeout(self.interval):
+                    await self._activity.wait()
+
+    async def __poll(self) -> list[ChangeEvent]:
+        """Fetch the current state and return what changed since last poll."""
+        self.polls += 1
+        state = dict(self._state or {})
+
+        # Both run concurrently, so a WS state source shares one DeviceInfo
+        results: list[Any] = await asyncio.gather(
+            self.client.get_data(),
+            self.client.get_device_info(),
+            return_exceptions=True,
+        )
+        data, device_info = results
+        if isinstance(data, dict):
+            for key, value in data.items():
+                state[(self.__get_kind(key), key)] = value
+        else:
+            _LOGGER.debug("Unable to poll state: %r", data)
+
+        try:
+            power = device_info["responses"][0]["DeviceInfo"][0]["clb_state_power"]
+            state[(WATCH_CHANGE_POWER, "power")] = power
+        except (IndexError, KeyError, TypeError):
+            _LOGGER.debug("Unable to poll power source: %r", device_info)
+
+        if self.door_id is not None and self.__wants(WATCH_CHANGE_PET):
+            try:
+                pet_status = await self.client.get_pet_status(self.door_id)
+            except Exception as ex:
+                _LOGGER.debug("Unable to poll pet status: %r", ex)
+            else:
+                for pet_id, event in pet_status.items():
+                    state[(WATCH_CHANGE_PET, pet_id)] = event
+
+        previous = self._state
+        self._state = state
+        if previous is None:
+            return []
+
+        changes = []
+        for (kind, key), value in state.items():
+            old = previous.get((kind, key))
+            if self.__identity(old) != self.__identity(value):
+                changes.append(ChangeEvent(kind, key, old, value))
+
+        return changes
+
+    def __wants(self, kind: str) -> bool:
+        """Return if any subscriber is interested in the given kind."""
+        return any(kinds is None or kind in kinds for _, kinds in self._subscribers)
+
+    @staticmethod
+    def __get_kind(key: str) -> str:
+        """Return the change kind for the given state key."""
+        if key == API_STATE_DOOR:
+            return WATCH_CHANGE_DOOR
+        if key == API_STATE_SYSTEM:
+            return WATCH_CHANGE_SYSTEM
+        return WATCH_CHANGE_MODE
+
+    @staticmethod
+    def __identity(value: Any) -> Any:
+        """Return the value used to detect changes."""
+        if isinstance(value, Event):
+            return value.id
+        return value
+
+
+class EventFollower:
+    """Class that polls the timeline of a door and yields new events only."""
+
+    def __init__(
+        self,
+        client: PyPetWALK,
+        door_id: int,
+        min_interval: float = FOLLOW_MIN_INTERVAL,
+        max_interval: float = FOLLOW_MAX_INTERVAL,
+        window: timedelta = timedelta(days=FOLLOW_WINDOW),
+    ) -> None:
+        """Initialize EventFollower object."""
+        self.client = client
+        self.door_id = door_id
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.window = window
+        self.interval = min_interval
+        self.polls = 0
+        self._seen: dict[int, datetime] = {}
+        self._activity = asyncio.Event()
+
+    async def follow(self) -> AsyncGenerator[Event, None]:
+        """Yield all events that happen from now on, oldest first."""
+        # Everything already in the timeline is old news, so nothing can be
+        # yielded before the timeline was fetched once
+        self.interval = self.min_interval
+        while (entries := await self.__poll()) is None:
+            await self.__wait()
+            self.interval = min(self.interval * 2, self.max_interval)
+        self.__new_events(entries)
+
+        self.interval = self.min_interval
+        while True:
+            await self.__wait()
+            events = self.__new_events(await self.__poll() or [])
+            if events:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * 2, self.max_interval)
+
+            for event in events:
+                yield event
+
+    def notify_activity(self) -> None:
+        """Poll right away and faster, e.g. after a command was sent."""
+        self.interval = self.min_interval
+        self._activity.set()
+
+    async def __wait(self) -> None:
+        """Wait for the current interval or until activity was notified."""
+        self._activity.clear()
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(self.interval):
+                await self._activity.wait()
+
+    async def __poll(self) -> list[dict] | None:
+        """Fetch the events of the window, or None on failure."""
+        self.polls += 1
+        try:
+            return await self.client.timeline.get(self.door_id, self.window, max_age=0)
+        except (BasePyPetWALKException, ClientError, TimeoutError) as ex:
+            _LOGGER.debug("Unable to poll events of door %s: %r", self.door_id, ex)
+            return None
+
+    def __new_events(self, entries: list[dict]) -> list[Event]:
+        """Return the unseen events and forget those outside the window."""
+        events = []
+        for event in Event.from_list(entries, registry=self.client.pet_registry):
+            if event.id not in self._seen:
+                self._seen[event.id] = event.date
+                events.append(event)
+
+        oldest = datetime.now(UTC) - self.window
+        self._seen = {
+            event_id: date for event_id, date in self._seen.items() if date >= oldest
+        }
+        return events
@@ -1,3 +1,4 @@
 """Module for the communication via unofficial local Websocket API."""
 # flake8: noqa
+from .capabilities import Capabilities
 from .ws import WS, Request
@@ -0,0 +1,214 @@
+"""pypetwalk is a Python library to communicate with the petWALK.control module."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any
+
+from pypetwalk.const import (
+    WS_FEATURE_COMMANDS,
+    WS_UNSUPPORTED_FAILURES,
+    WS_UNSUPPORTED_RETRY_AFTER,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Capabilities:
+    """Class to keep track of the Websocket commands supported by a door.
+
+    Only commands the door rejected as unknown are persisted. Commands that
+    keep failing otherwise, e.g. by timing out, are skipped for a while. The
+    persisted commands of the last known door apply until DeviceInfo tells
+    which door and firmware we are talking to.
+    """
+
+    def __init__(
+        self,
+        cache_path: str | None = None,
+        max_failures: int = WS_UNSUPPORTED_FAILURES,
+        retry_after: float = WS_UNSUPPORTED_RETRY_AFTER,
+    ) -> None:
+        """Initialize Capabilities object."""
+        self.cache_path = cache_path
+        self.max_failures = max_failures
+        self.retry_after = retry_after
+        self.serial: str | None = None
+        self.sw_version: str | None = None
+        self.ws_version: str | None = None
+        self.features: dict[str, bool] = {}
+        self._cache: dict[str, list[str]] = {}
+        self._last_key: str | None = None
+        self._loaded = False
+        self._preloaded: set[str] = set()
+        self._save_lock = asyncio.Lock()
+        self._observed: set[str] = set()
+        self._unsupported: set[str] = set()
+        self._failures: dict[str, int] = {}
+        self._skipped_until: dict[str, float] = {}
+
+    @property
+    def key(self) -> str | None:
+        """Return the cache key for the current serial and firmware version."""
+        if self.serial is None:
+            return None
+
+        return f"{self.serial}/{self.sw_version}/{self.ws_version}"
+
+    @property
+    def unsupported(self) -> frozenset[str]:
+        """Return all commands known to be unsupported."""
+        return frozenset(self._unsupported)
+
+    def is_supported(self, command: str) -> bool:
+        """Return False if the command is known to be unsupported."""
+        if command in self._unsupported:
+            return False
+
+        skipped_until = self._skipped_until.get(command)
+        if skipped_until is not None and time.monotonic() < skipped_until:
+            return False
+
+        return True
+
+    async def load(self) -> None:
+        """Load the persisted commands of the last known door, once."""
+        if self._loaded:
+            return
+
+        self._loaded = True
+        data = await asyncio.get_running_loop().run_in_executor(None, self.__read)
+        self._cache = data.get("doors", {})
+        self._last_key = data.get("last")
+        if self.key is None and self._last_key is not None:
+            self._preloaded = set(self._cache.get(self._last_key, [])) - self._observed
+            self._observed |= self._preloaded
+            self.__update_unsupported()
+
+    async def update_from_device_info(self, device_info: dict) -> None:
+        """Update the capabilities from a DeviceInfo response."""
+        await self.load()
+        try:
+            info = device_info["responses"][0]["DeviceInfo"][0]
+            serial = info["serial"]
+        except (IndexError, KeyError, TypeError):
+            _LOGGER.debug("Unable to read capabilities from %s", device_info)
+            return
+
+        previous_key = self.key
+        key_changed = (serial, info.get("sw_version"), info.get("ws_version")) != (
+            self.serial,
+            self.sw_version,
+            self.ws_version,
+        )
+        self.serial = serial
+        self.sw_version = info.get("sw_version")
+        self.ws_version = info.get("ws_version")
+        self.features = dict(info.get("clb_features") or {})
+
+        if key_changed:
+            if previous_key is not None:
+                # Another door or firmware, previous observations don't apply
+                self._observed = set()
+                self._failures = {}
+                self._skipped_until = {}
+            elif self.key != self._last_key:
+                # Not the door the persisted commands were loaded for
+                self._observed -= self._preloaded
+            self._preloaded = set()
+            self._observed |= set(self._cache.get(f"{self.key}", []))
+
+        self.__update_unsupported()
+
+        if key_changed:
+            await self.__save()
+
+    async def mark_unsupported(self, command: str) -> None:
+        """Remember that the door does not support the given command."""
+        self._preloaded.discard(command)
+        if command in self._observed:
+            return
+
+        _LOGGER.debug("Marking command %s as unsupported", command)
+        self._observed.add(command)
+        self._unsupported.add(command)
+        await self.__save()
+
+    def mark_failed(self, command: str) -> None:
+        """Count a transient failure, skipping the command after too many."""
+        failures = self._failures.get(command, 0) + 1
+        self._failures[command] = failures
+        if failures >= self.max_failures:
+            _LOGGER.debug(
+                "Skipping command %s for %ss after %s failures",
+                command,
+                self.retry_after,
+                failures,
+            )
+            self._skipped_until[command] = time.monotonic() + self.retry_after
+            self._failures[command] = 0
+
+    def mark_succeeded(self, command: str) -> None:
+        """Forget the transient failures of the given command."""
+        self._failures.pop(command, None)
+        self._skipped_until.pop(command, None)
+
+    async def clear(self, command: str | None = None) -> None:
+        """Forget what is known about the command, or about all commands."""
+        if command is None:
+            self._observed = set()
+            self._failures = {}
+            self._skipped_until = {}
+        else:
+            self._observed.discard(command)
+            self.mark_succeeded(command)
+
+        self.__update_unsupported()
+        await self.__save()
+
+    def __update_unsupported(self) -> None:
+        """Combine the observed and the disabled feature commands."""
+        self._unsupported = set(self._observed)
+        for feature, enabled in self.features.items():
+            if not enabled:
+                self._unsupported.update(WS_FEATURE_COMMANDS.get(feature, ()))
+
+    def __read(self) -> dict[str, Any]:
+        """Read the persisted capabilities from disk."""
+        if self.cache_path is None:
+            return {}
+
+        try:
+            with open(self.cache_path, encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as ex:
+            _LOGGER.debug("Unable to load capability cache: %s", ex)
+            return {}
+
+        if not isinstance(data, dict) or not isinstance(data.get("doors"), dict):
+            return {}
+
+        return data
+
+    def __write(self, data: dict[str, Any]) -> None:
+        """Write the persisted capabilities to disk."""
+        try:
+            with open(f"{self.cache_path}", "w", encoding="utf-8") as cache_file:
+                json.dump(data, cache_file)
+        except OSError as ex:
+            _LOGGER.debug("Unable to write capability cache: %s", ex)
+
+    async def __save(self) -> None:
+        """Persist the observed capabilities of the current door."""
+        if self.cache_path is None or self.key is None:
+            return
+
+        self._cache[self.key] = sorted(self._observed)
+        self._last_key = self.key
+        data = {"last": self._last_key, "doors": dict(self._cache)}
+        async with self._save_lock:
+            await asyncio.get_running_loop().run_in_executor(None, self.__write, data)
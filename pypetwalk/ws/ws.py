@@ -1,8 +1,11 @@
 """pypetwalk is a Python library to communicate with the petWALK.control module."""
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncGenerator
 import json
 import logging
+import time
 from types import TracebackType
 
 from aiohttp import ClientSession, ClientTimeout, WSMsgType
@@ -29,11 +32,19 @@ from pypetwalk.const import (
     WS_COMMAND_ZIGBEE_NAME_DEVICE,
     WS_COMMAND_ZIGBEE_REMOVE_DEVICE,
     WS_COMMAND_ZIGBEE_UPDATE,
+    WS_FIRMWARE_DEPENDENT_COMMANDS,
     WS_REQUEST_TIMEOUT,
+    WS_UNKNOWN_COMMAND_ERROR,
+    WS_WIFI_SCAN_IDLE_TIMEOUT,
+    WS_WIFI_SCAN_TIMEOUT,
     ZIGBEE_DEFAULT_JOIN_TYPE,
 )
-from pypetwalk.exceptions import PyPetWALKClientConnectionError
+from pypetwalk.exceptions import (
+    PyPetWALKClientConnectionError,
+    PyPetWALKUnsupportedCommand,
+)
 
+from .capabilities import Capabilities
 from .request import Request
 
 _LOGGER = logging.getLogger(__name__)
@@ -42,10 +53,16 @@ _LOGGER = logging.getLogger(__name__)
 class WS:
     """Class for Websocket communication."""
 
-    def __init__(self, host: str, port: int) -> None:
+    def __init__(
+        self, host: str, port: int, capabilities: Capabilities | None = None
+    ) -> None:
         """Initialize Websocket Class."""
         self.server_host = host
         self.server_port = port
+        self.last_success: float | None = None
+        self.last_failure: float | None = None
+        self.in_flight = 0
+        self.capabilities = capabilities if capabilities is not None else Capabilities()
         self.session = ClientSession(timeout=ClientTimeout(total=WS_REQUEST_TIMEOUT))
 
     async def __aenter__(self) -> WS:
@@ -133,7 +150,9 @@ class WS:
 
     async def device_info(self) -> dict:
         """Get current device information."""
-        return await self.send_command(WS_COMMAND_DEVICE_INFO, [])
+        result = await self.send_command(WS_COMMAND_DEVICE_INFO, [])
+        await self.capabilities.update_from_device_info(result)
+        return result
 
     async def wifi_network_list(self) -> dict:
         """Get Wifi network list."""
@@ -154,6 +173,69 @@ class WS:
         """Start Wifi scan."""
         return await self.send_command(WS_COMMAND_WIFI_SCAN, [])
 
+    async def scan_wifi(
+        self,
+        timeout: float = WS_WIFI_SCAN_TIMEOUT,
+        idle_timeout: float = WS_WIFI_SCAN_IDLE_TIMEOUT,
+    ) -> AsyncGenerator[dict, None]:
+        """Start Wifi scan and yield networks as soon as they are reported.
+
+        The scan ends with a reply without networks, when no more results
+        arrive for idle_timeout seconds or after timeout seconds at most.
+        """
+        await self.capabilities.load()
+        self.__check_supported(WS_COMMAND_WIFI_SCAN)
+        request = Request().build_request(WS_COMMAND_WIFI_SCAN, [])
+        deadline = asyncio.get_running_loop().time() + timeout
+        seen: set[tuple[str | None, str | None]] = set()
+        received = False
+
+        url = f"ws://{self.server_host}:{self.server_port}"
+        self.in_flight += 1
+        try:
+            async with self.__get_session().ws_connect(url) as websocket_connection:
+                await websocket_connection.send_str(request.get_json())
+
+                while True:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    if received:
+                        remaining = min(remaining, idle_timeout)
+                    if remaining <= 0:
+                        break
+
+                    try:
+                        msg = await websocket_connection.receive(remaining)
+                    except TimeoutError:
+                        break
+
+                    if msg.type == WSMsgType.ERROR:
+                        _LOGGER.error("Unable to connect to WS %s", url)
+                        self.last_failure = time.monotonic()
+                        break
+                    if msg.type != WSMsgType.TEXT:
+                        break
+
+                    received = True
+                    self.last_success = time.monotonic()
+                    networks = self.__get_networks(json.loads(msg.data))
+                    if not networks:
+                        # The door reports the end of the scan without networks
+                        break
+
+                    for network in networks:
+                        key = (network.get("ssid"), network.get("bssid"))
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        yield network
+        except (ClientConnectorError, ServerDisconnectedError) as ex:
+            _LOGGER.debug("%s", ex)
+            self.last_failure = time.monotonic()
+            await self.close()
+            raise PyPetWALKClientConnectionError(ex) from ex
+        finally:
+            self.in_flight -= 1
+
     # @todo - Time format is undocumented!
     async def time_set(self, time: str) -> dict:
         """Set given time."""
@@ -171,6 +253,16 @@ class WS:
 
     async def send_command(self, command: str, params: list) -> dict:
         """Send command to local Websocket."""
+        await self.capabilities.load()
+        self.__check_supported(command)
+        self.in_flight += 1
+        try:
+            return await self.__send_command(command, params)
+        finally:
+            self.in_flight -= 1
+
+    async def __send_command(self, command: str, params: list) -> dict:
+        """Send command to local Websocket and wait for the response."""
         request = Request().build_request(command, params)
 
         url = f"ws://{self.server_host}:{self.server_port}"
@@ -185,14 +277,54 @@ class WS:
                     else:
                         if msg.type == WSMsgType.TEXT:
                             result = json.loads(msg.data)
+                            self.last_success = time.monotonic()
+                            await self.__check_response(command, result)
                     return result
         except (ClientConnectorError, ServerDisconnectedError) as ex:
             _LOGGER.debug("%s", ex)
+            self.last_failure = time.monotonic()
             await self.close()
             raise PyPetWALKClientConnectionError(ex) from ex
+        except TimeoutError:
+            if command in WS_FIRMWARE_DEPENDENT_COMMANDS:
+                self.capabilities.mark_failed(command)
+            raise
 
         return {}
 
+    def __check_supported(self, command: str) -> None:
+        """Raise if the door is known to not support the given command."""
+        if not self.capabilities.is_supported(command):
+            raise PyPetWALKUnsupportedCommand(
+                f"Command {command} is not supported by the door"
+            )
+
+    async def __check_response(self, command: str, result: dict) -> None:
+        """Remember commands the door answered with an error."""
+        try:
+            response = result["responses"][0]
+        except (IndexError, KeyError, TypeError):
+            return
+
+        if not isinstance(response, dict) or command in response:
+            self.capabilities.mark_succeeded(command)
+        elif WS_UNKNOWN_COMMAND_ERROR in str(response.get("error", "")).lower():
+            await self.capabilities.mark_unsupported(command)
+        elif "error" in response:
+            self.capabilities.mark_failed(command)
+
+    @staticmethod
+    def __get_networks(data: dict) -> list[dict]:
+        """Return all networks contained in a Wifi scan message."""
+        networks = []
+        for response in data.get("responses", []):
+            for command in (WS_COMMAND_WIFI_SCAN, WS_COMMAND_WIFI_NETWORK_LIST):
+                for network in response.get(command) or []:
+                    if isinstance(network, dict):
+                        networks.append(network)
+
+        return networks
+
     def __get_session(self) -> ClientSession:
         """Return current session, recreating if it was closed."""
         if self.session.closed:
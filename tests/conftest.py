@@ -1,6 +1,8 @@
 """Conftest for pypetwalk."""
 from __future__ import annotations
 
+import base64
+import json
 import uuid
 
 import pytest
@@ -112,6 +114,15 @@ class FakeAPI:
         return json_response
 
 
+def make_jwt(exp: float, subject: str = "user") -> str:
+    """Returns an unsigned JWT expiring at exp."""
+
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+    return f"{encode({'alg': 'none'})}.{encode({'sub': subject, 'exp': exp})}."
+
+
 @pytest.fixture
 def fake_api():
     """Fake API fixture."""
@@ -678,3 +689,41 @@ def pet_object_data():
             "unknown": True,
         },
     ]
+
+
+@pytest.fixture
+def wifi_scan():
+    """Fixture for scan_wifi test."""
+    return {
+        "command": "WifiScan",
+        "responses": [
+            {
+                "request-id": "5e0a0a48-8f6d-4a4c-9a5e-4c1d5b7a6c01",
+                "responses": [
+                    {
+                        "WifiScan": [
+                            {"ssid": "Home", "bssid": "aa:bb:cc:dd:ee:01", "rssi": -40},
+                            {
+                                "ssid": "Guest",
+                                "bssid": "aa:bb:cc:dd:ee:02",
+                                "rssi": -60,
+                            },
+                        ]
+                    }
+                ],
+                "version": "2.0.0",
+            },
+            {
+                "request-id": "5e0a0a48-8f6d-4a4c-9a5e-4c1d5b7a6c01",
+                "responses": [
+                    {
+                        "WifiScan": [
+                            {"ssid": "Home", "bssid": "aa:bb:cc:dd:ee:01", "rssi": -41},
+                            {"ssid": "Home", "bssid": "aa:bb:cc:dd:ee:03", "rssi": -70},
+                        ]
+                    }
+                ],
+                "version": "2.0.0",
+            },
+        ],
+    }
@@ -1,14 +1,37 @@
 """Test for pypetwalk."""
 from __future__ import annotations
 
-from datetime import UTC, datetime, timezone
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+from datetime import UTC, datetime, timedelta, timezone
 import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
 
 from aiohttp import WSMsgType, web
 import pytest
 
 from pypetwalk import PyPetWALK
-from pypetwalk.aws import Event, Pet
+from pypetwalk.aws import (
+    BlockingExecutor,
+    Event,
+    FileTokenStore,
+    LazyEvent,
+    Pet,
+    PetRegistry,
+    RateLimiter,
+    TokenStore,
+    decode_events,
+    decode_pets,
+    encode_events,
+    encode_pets,
+)
+from pypetwalk.aws.stream import JSONArrayParser
 from pypetwalk.const import (
     API_METHOD_MAPPING,
     API_PATH_MAPPING,
@@ -20,22 +43,34 @@ from pypetwalk.const import (
     API_STATE_RFID,
     API_STATE_SYSTEM,
     API_STATE_TIME,
+    AWS_TOKEN_REFRESH_MARGIN,
     PET_SPECIES_MAPPING,
+    STATE_SOURCE_API,
+    STATE_SOURCE_WS,
     UNKNOWN_PET_ID,
     UNKNOWN_PET_NAME,
+    WATCH_CHANGE_DOOR,
     WS_COMMAND_RFID_START_LEARN,
+    WS_COMMAND_RFID_TAG_EXISTS,
+    WS_COMMAND_WIFI_SCAN,
     WS_PORT,
 )
 from pypetwalk.exceptions import (
     BasePyPetWALKException,
+    PyPetWALKClientAWSAuthenticationError,
     PyPetWALKClientConnectionError,
     PyPetWALKInvalidResponse,
     PyPetWALKInvalidResponseStatus,
     PyPetWALKInvalidResponseValue,
+    PyPetWALKRateLimited,
+    PyPetWALKUnsupportedCommand,
 )
-from pypetwalk.ws import Request
+from pypetwalk.requestlog import RequestLogger
+from pypetwalk.timeline import DoorTimeline, TimelineSync
+from pypetwalk.watch import ChangeEvent
+from pypetwalk.ws import Capabilities, Request
 
-from .conftest import FakeAPI
+from .conftest import FakeAPI, make_jwt
 
 
 @pytest.mark.asyncio
@@ -768,6 +803,154 @@ def test_invalid_event_object(get_invalid_timeline: list[dict]) -> None:
             Event(event_data)
 
 
+def test_event_from_list(
+    get_timeline: list[dict], get_invalid_timeline: list[dict]
+) -> None:
+    """Test events are built in one pass, collecting invalid entries."""
+    invalid: list[dict] = []
+    events = Event.from_list(get_timeline + get_invalid_timeline, invalid)
+
+    assert [event.id for event in events] == [entry["id"] for entry in get_timeline]
+    assert invalid == get_invalid_timeline
+    assert Event.from_list(get_invalid_timeline) == []
+    assert not hasattr(events[0], "__dict__"), "Event has no __slots__"
+    assert not hasattr(events[0].pet, "__dict__"), "Pet has no __slots__"
+
+
+def test_lazy_event_object(get_timeline: list[dict]) -> None:
+    """Test LazyEvent decodes the same fields as Event, on first access."""
+    for lazy, event in zip(
+        LazyEvent.from_list(get_timeline), Event.from_list(get_timeline)
+    ):
+        for field in (
+            "id",
+            "event_type",
+            "event_source",
+            "date",
+            "rfid_index",
+            "direction",
+            "local_component_id",
+        ):
+            assert getattr(lazy, field) == getattr(event, field), f"Wrong {field}"
+        if event.pet is None:
+            assert lazy.pet is None
+        else:
+            assert (lazy.pet.id, lazy.pet.name, lazy.pet.species) == (
+                event.pet.id,
+                event.pet.name,
+                event.pet.species,
+            )
+        assert lazy.date is lazy.date, "Date was decoded again"
+
+    # Fields which are not accessed are never decoded
+    lazy = LazyEvent(
+        {"id": 1, "event_type": "open", "event_source": "DOOR", "date": "invalid"}
+    )
+    assert lazy.event_type == "open"
+    with pytest.raises(ValueError):
+        lazy.date
+    with pytest.raises(ValueError):
+        lazy.to_event()
+
+
+def test_pet_registry(get_timeline: list[dict]) -> None:
+    """Test events share one Pet per id, merged with DeviceInfo data."""
+    registry = PetRegistry()
+    garfield = registry.merge_device_info(
+        [
+            "e64226a5-a435-4fbe-98f3-83258041e4ea",
+            "Garfield",
+            "cat",
+            {"in": "default", "out": "never"},
+            1651098738,
+            None,
+        ]
+    )
+
+    events = Event.from_list(get_timeline, registry=registry)
+    pets = [event.pet for event in events if event.pet is not None]
+    assert len(registry) == len({pet.id for pet in pets})
+    for pet in pets:
+        assert pet is registry.get(pet.id), "Pet was not interned"
+
+    assert registry.get(garfield.id) is garfield
+    assert garfield.name == "Garfield", "Timeline name replaced DeviceInfo name"
+    assert garfield.config_out == "never", "DeviceInfo config was lost"
+    assert LazyEvent(get_timeline[0], registry).pet is garfield
+    assert registry.unknown() is registry.unknown()
+
+    # DeviceInfo replaces what was only known from the timeline
+    other = registry.get("45d62731-8bae-4483-9a5e-6f7404b6870a")
+    assert other is not None and other.name != "Tom"
+    registry.merge_device_info([other.id, "Tom", "cat", {}, 1651098738, None])
+    assert other.name == "Tom", "DeviceInfo name was not merged"
+    Event.from_list(get_timeline, registry=registry)
+    decode_events(encode_events(Event.from_list(get_timeline)), registry)
+    assert other.name == "Tom", "Timeline name replaced DeviceInfo name"
+
+
+def test_event_codec(get_timeline: list[dict]) -> None:
+    """Test events survive the binary encoding, sharing their pets."""
+    events = Event.from_list(get_timeline)
+    data = encode_events(events)
+    assert data.startswith(b"PWEV")
+    assert len(data) * 3 < len(json.dumps(get_timeline)), "Encoding is not compact"
+    assert encode_events(LazyEvent.from_list(get_timeline)) == data
+    shared = encode_events(Event.from_list(get_timeline, registry=PetRegistry()))
+    assert data == shared, "Pets were duplicated without a registry"
+
+    registry = PetRegistry()
+    decoded = decode_events(data, registry)
+    assert len(decoded) == len(events)
+    for event, result in zip(events, decoded):
+        for field in (
+            "id",
+            "event_type",
+            "event_source",
+            "date",
+            "rfid_index",
+            "direction",
+            "local_component_id",
+        ):
+            assert getattr(result, field) == getattr(event, field), f"Wrong {field}"
+        if event.pet is None:
+            assert result.pet is None
+        else:
+            assert result.pet is registry.get(event.pet.id), "Pet was not shared"
+            assert (result.pet.name, result.pet.species) == (
+                event.pet.name,
+                event.pet.species,
+            )
+
+    assert decode_events(encode_events([])) == []
+
+    entry = {**get_timeline[0], "id": "123"}
+    entry["properties"] = {**entry["properties"], "rfid_index": "3"}
+    (result,) = decode_events(encode_events(Event.from_list([entry])))
+    assert (result.id, result.rfid_index) == (123, 3), "Numeric strings not coerced"
+    with pytest.raises(ValueError):
+        encode_events(Event.from_list([{**entry, "id": "abc"}]))
+    with pytest.raises(ValueError):
+        decode_events(data[:-1])
+    with pytest.raises(ValueError):
+        decode_events(encode_pets([]))
+
+
+def test_pet_codec(pet_object_data: list[dict]) -> None:
+    """Test pets survive the binary encoding."""
+    pets = [
+        Pet(**{**pet, "pet_id": str(pet["pet_id"]), "name": str(pet["name"])})
+        for pet in pet_object_data
+    ]
+    pets.append(Pet(pet_id=UNKNOWN_PET_ID, name="Unknown", unknown=True))
+
+    decoded = decode_pets(encode_pets(pets))
+    for pet, result in zip(pets, decoded, strict=True):
+        for field in ("id", "name", "species", "config_in", "config_out", "unknown"):
+            assert getattr(result, field) == getattr(pet, field), f"Wrong {field}"
+        assert result.created.timestamp() == int(pet.created.timestamp())
+
+
 def test_pet_object(pet_object_data: list[dict]) -> None:
     """Test Pet Object."""
     for expected_pet in pet_object_data:
@@ -821,6 +1004,1574 @@ def test_pet_object(pet_object_data: list[dict]) -> None:
             ), f"Invalid direct assigment of Pet Unknown for {expected_pet}"
 
 
+@pytest.mark.asyncio
+async def test_scan_wifi(aiohttp_server: any, wifi_scan: any) -> None:
+    """Test scan_wifi yields deduplicated networks from all messages."""
+
+    async def handler(request: web.Request) -> web.WebSocketResponse:
+        websocket_client = web.WebSocketResponse()
+        await websocket_client.prepare(request)
+
+        async for msg in websocket_client:
+            data = json.loads(msg.data)
+            assert (
+                data["requests"][0]["function"] == wifi_scan["command"]
+            ), "Invalid WS command received"
+
+            for response in wifi_scan["responses"]:
+                await websocket_client.send_str(json.dumps(response))
+            await websocket_client.close()
+
+        return websocket_client
+
+    app = web.Application()
+    app.add_routes([web.get("/", handler)])
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        server.host, ws_port=server.port, username="username", password="password"
+    )
+
+    networks = [network async for network in client.scan_wifi()]
+
+    assert [(network["ssid"], network["bssid"]) for network in networks] == [
+        ("Home", "aa:bb:cc:dd:ee:01"),
+        ("Guest", "aa:bb:cc:dd:ee:02"),
+        ("Home", "aa:bb:cc:dd:ee:03"),
+    ], "Networks are not deduplicated by SSID/BSSID"
+
+    await server.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("end_of_scan", [True, False])
+async def test_scan_wifi_finished(
+    aiohttp_server: any, wifi_scan: any, end_of_scan: bool
+) -> None:
+    """Test scan_wifi stops on an empty reply or when results stop arriving."""
+
+    async def handler(request: web.Request) -> web.WebSocketResponse:
+        websocket_client = web.WebSocketResponse()
+        await websocket_client.prepare(request)
+
+        async for _ in websocket_client:
+            for response in wifi_scan["responses"]:
+                await websocket_client.send_str(json.dumps(response))
+            if end_of_scan:
+                await websocket_client.send_str(
+                    json.dumps({"responses": [{wifi_scan["command"]: []}]})
+                )
+            else:
+                await asyncio.sleep(5)
+
+        return websocket_client
+
+    app = web.Application()
+    app.add_routes([web.get("/", handler)])
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        server.host, ws_port=server.port, username="username", password="password"
+    )
+
+    start = time.monotonic()
+    networks = [
+        network
+        async for network in client.scan_wifi(
+            timeout=5, idle_timeout=60 if end_of_scan else 0.1
+        )
+    ]
+
+    assert len(networks) == 3
+    assert time.monotonic() - start < 1, "Scan waited for the whole timeout"
+    assert client.websocket_client.last_success is not None, "Success not recorded"
+
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_scan_wifi_deadline(aiohttp_server: any, wifi_scan: any) -> None:
+    """Test scan_wifi stops when the deadline is reached."""
+
+    async def handler(request: web.Request) -> web.WebSocketResponse:
+        websocket_client = web.WebSocketResponse()
+        await websocket_client.prepare(request)
+
+        async for _ in websocket_client:
+            await websocket_client.send_str(json.dumps(wifi_scan["responses"][0]))
+            await asyncio.sleep(5)
+
+        return websocket_client
+
+    app = web.Application()
+    app.add_routes([web.get("/", handler)])
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        server.host, ws_port=server.port, username="username", password="password"
+    )
+
+    networks = [network async for network in client.scan_wifi(timeout=0.2)]
+
+    assert len(networks) == 2, "Networks reported before the deadline are missing"
+
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_capabilities_from_device_info(
+    aiohttp_server: any, device_info: any
+) -> None:
+    """Test commands disabled by clb_features are rejected locally."""
+    calls = []
+
+    async def handler(request: web.Request) -> web.WebSocketResponse:
+        websocket_client = web.WebSocketResponse()
+        await websocket_client.prepare(request)
+
+        async for msg in websocket_client:
+            calls.append(json.loads(msg.data)["requests"][0]["function"])
+            await websocket_client.send_str(json.dumps(device_info["response"]))
+            await websocket_client.close()
+
+        return websocket_client
+
+    app = web.Application()
+    app.add_routes([web.get("/", handler)])
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        server.host, ws_port=server.port, username="username", password="password"
+    )
+
+    await client.get_device_info()
+    with pytest.raises(PyPetWALKUnsupportedCommand):
+        await client.websocket_client.zig_bee_list_devices()
+
+    assert calls == [device_info["command"]], "Unsupported command was sent to door"
+
+    await client.disconnect()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_capabilities_cache(
+    aiohttp_server: any, device_info: any, tmp_path: any
+) -> None:
+    """Test commands answered with an error are cached per firmware."""
+    calls = []
+
+    async def handler(request: web.Request) -> web.WebSocketResponse:
+        websocket_client = web.WebSocketResponse()
+        await websocket_client.prepare(request)
+
+        async for msg in websocket_client:
+            function = json.loads(msg.data)["requests"][0]["function"]
+            calls.append(function)
+            if function == device_info["command"]:
+                await websocket_client.send_str(json.dumps(device_info["response"]))
+            else:
+                await websocket_client.send_str(
+                    json.dumps({"responses": [{"error": "unknown function"}]})
+                )
+            await websocket_client.close()
+
+        return websocket_client
+
+    app = web.Application()
+    app.add_routes([web.get("/", handler)])
+    server = await aiohttp_server(app)
+    cache_path = str(tmp_path / "capabilities.json")
+
+    def make_client() -> PyPetWALK:
+        return PyPetWALK(
+            server.host,
+            ws_port=server.port,
+            username="username",
+            password="password",
+            capabilities_cache_path=cache_path,
+        )
+
+    client = make_client()
+    await client.get_device_info()
+    await client.websocket_client.rfid_tag_exists()
+    with pytest.raises(PyPetWALKUnsupportedCommand):
+        await client.websocket_client.rfid_tag_exists()
+    await client.disconnect()
+
+    # The last known door applies before the first DeviceInfo
+    calls.clear()
+    client = make_client()
+    with pytest.raises(PyPetWALKUnsupportedCommand):
+        await client.websocket_client.rfid_tag_exists()
+    assert not calls, "Cached unsupported command was sent to door"
+    await client.get_device_info()
+    assert not client.websocket_client.capabilities.is_supported(
+        WS_COMMAND_RFID_TAG_EXISTS
+    ), "Unsupported command was not restored from cache"
+    await client.disconnect()
+
+    # Another door drops the commands of the last known door
+    other = json.loads(json.dumps(device_info["response"]))
+    other["responses"][0]["DeviceInfo"][0]["serial"] = "other"
+    capabilities = Capabilities(cache_path)
+    await capabilities.load()
+    assert not capabilities.is_supported(WS_COMMAND_RFID_TAG_EXISTS)
+    await capabilities.update_from_device_info(other)
+    assert capabilities.is_supported(
+        WS_COMMAND_RFID_TAG_EXISTS
+    ), "Cache of another door was applied"
+
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_capabilities_transient_failures(device_info: any, tmp_path: any) -> None:
+    """Test transient failures skip a command for a while, without persisting."""
+    cache_path = str(tmp_path / "capabilities.json")
+    capabilities = Capabilities(cache_path, max_failures=2, retry_after=60)
+    await capabilities.update_from_device_info(device_info["response"])
+
+    capabilities.mark_failed(WS_COMMAND_WIFI_SCAN)
+    assert capabilities.is_supported(WS_COMMAND_WIFI_SCAN), "Skipped too early"
+    capabilities.mark_failed(WS_COMMAND_WIFI_SCAN)
+    assert not capabilities.is_supported(WS_COMMAND_WIFI_SCAN), "Was not skipped"
+
+    restored = Capabilities(cache_path)
+    await restored.update_from_device_info(device_info["response"])
+    assert restored.is_supported(WS_COMMAND_WIFI_SCAN), "Failure was persisted"
+
+    await capabilities.clear(WS_COMMAND_WIFI_SCAN)
+    assert capabilities.is_supported(WS_COMMAND_WIFI_SCAN), "Failure not cleared"
+
+    await capabilities.mark_unsupported(WS_COMMAND_RFID_TAG_EXISTS)
+    await capabilities.clear()
+    restored = Capabilities(cache_path)
+    await restored.update_from_device_info(device_info["response"])
+    assert restored.is_supported(WS_COMMAND_RFID_TAG_EXISTS), "Cache not cleared"
+
+
+@pytest.mark.asyncio
+async def test_capabilities_other_errors(aiohttp_server: any, device_info: any) -> None:
+    """Test errors other than an unknown command do not mark it unsupported."""
+
+    async def handler(request: web.Request) -> web.WebSocketResponse:
+        websocket_client = web.WebSocketResponse()
+        await websocket_client.prepare(request)
+
+        async for msg in websocket_client:
+            function = json.loads(msg.data)["requests"][0]["function"]
+            if function == device_info["command"]:
+                await websocket_client.send_str(json.dumps(device_info["response"]))
+            else:
+                await websocket_client.send_str(
+                    json.dumps({"responses": [{"error": "busy"}]})
+                )
+            await websocket_client.close()
+
+        return websocket_client
+
+    app = web.Application()
+    app.add_routes([web.get("/", handler)])
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        server.host, ws_port=server.port, username="username", password="password"
+    )
+
+    await client.get_device_info()
+    await client.websocket_client.rfid_tag_exists()
+    await client.websocket_client.rfid_tag_exists()
+    assert client.websocket_client.capabilities.is_supported(
+        WS_COMMAND_RFID_TAG_EXISTS
+    ), "Command was marked unsupported"
+
+    await client.disconnect()
+    await server.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("cfg_flags", "modes", "door", "system"),
+    [
+        (
+            0b01101,
+            {
+                "motion_in": True,
+                "motion_out": False,
+                "rfid": True,
+                "time": True,
+                "brightnessSensor": False,
+            },
+            "closed",
+            "on",
+        ),
+        (
+            0b10010,
+            {
+                "motion_in": False,
+                "motion_out": True,
+                "rfid": False,
+                "time": False,
+                "brightnessSensor": True,
+            },
+            "open",
+            "off",
+        ),
+    ],
+)
+async def test_get_ws_data_matches_api_data(
+    aiohttp_server: any,
+    fake_api: FakeAPI,
+    device_info: any,
+    cfg_flags: int,
+    modes: dict[str, bool],
+    door: str,
+    system: str,
+) -> None:
+    """Test DeviceInfo based state matches the local API state.
+
+    The clb_cfg_flags values encode the assumed WS_CFG_FLAGS_MAPPING layout by
+    hand, as no captured /modes and DeviceInfo pair of one door exists. This
+    checks the decoding, not that the assumed bits are right.
+    """
+    fake_api.json_mode |= modes
+    fake_api.json_state |= {"door": door, "system": system}
+    json_responses = {
+        API_PATH_MAPPING["mode"]: fake_api.json_mode,
+        API_PATH_MAPPING["state"]: fake_api.json_state,
+    }
+
+    response = json.loads(json.dumps(device_info["response"]))
+    info = response["responses"][0]["DeviceInfo"][0]
+    info["clb_cfg_flags"] = cfg_flags
+    info["clb_state_door_pos"] = door
+    info["clb_state_opmode"] = system
+
+    async def api_handler(request: web.Request) -> web.Response:
+        return web.json_response(json_responses[request.path], status=200)
+
+    async def ws_handler(request: web.Request) -> web.WebSocketResponse:
+        websocket_client = web.WebSocketResponse()
+        await websocket_client.prepare(request)
+
+        async for _ in websocket_client:
+            await websocket_client.send_str(json.dumps(response))
+            await websocket_client.close()
+
+        return websocket_client
+
+    app = web.Application()
+    app.add_routes([web.get("/", ws_handler)])
+    for path in API_PATH_MAPPING.values():
+        app.add_routes([web.get(path, api_handler)])
+
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        server.host,
+        api_port=server.port,
+        ws_port=server.port,
+        username="username",
+        password="password",
+        state_source=STATE_SOURCE_WS,
+    )
+
+    api_data = await client.get_api_data()
+    ws_data = await client.get_data()
+
+    assert set(ws_data) == set(API_METHOD_MAPPING), "Missing keys in DeviceInfo data"
+    assert ws_data == api_data, "DeviceInfo data differs from local API data"
+
+    await client.disconnect()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_door_state_fallback(aiohttp_server: any, device_info: any) -> None:
+    """Test door state is read via WS when the local API fails."""
+
+    async def api_handler(request: web.Request) -> web.Response:
+        return web.json_response({}, status=500)
+
+    async def ws_handler(request: web.Request) -> web.WebSocketResponse:
+        websocket_client = web.WebSocketResponse()
+        await websocket_client.prepare(request)
+
+        async for _ in websocket_client:
+            await websocket_client.send_str(json.dumps(device_info["response"]))
+            await websocket_client.close()
+
+        return websocket_client
+
+    app = web.Application()
+    app.add_routes([web.get("/", ws_handler)])
+    for path in API_PATH_MAPPING.values():
+        app.add_routes([web.get(path, api_handler)])
+
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        server.host,
+        api_port=server.port,
+        ws_port=server.port,
+        username="username",
+        password="password",
+    )
+
+    assert await client.get_door_state() is False, "Incorrect door state"
+    assert client.state_router.last_transport == STATE_SOURCE_WS, "WS did not answer"
+    assert client.state_router.health[STATE_SOURCE_API].errors == 1
+
+    assert await client.get_system_state() is True, "Incorrect system state"
+    assert (
+        client.state_router.health[STATE_SOURCE_API].errors == 1
+    ), "Unhealthy transport was not skipped"
+    assert client.state_router.order() == [STATE_SOURCE_WS, STATE_SOURCE_API]
+
+    await client.disconnect()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_partial_failure(
+    aiohttp_server: any, fake_api: FakeAPI, device_info: any, update_info: any
+) -> None:
+    """Test snapshot keeps data of sources that answered before the deadline."""
+
+    async def api_handler(request: web.Request) -> web.Response:
+        return web.json_response(
+            fake_api.get_activated_json_for_path(request.path), status=200
+        )
+
+    async def ws_handler(request: web.Request) -> web.WebSocketResponse:
+        websocket_client = web.WebSocketResponse()
+        await websocket_client.prepare(request)
+
+        async for _ in websocket_client:
+            await websocket_client.send_str(json.dumps(device_info["response"]))
+            await websocket_client.close()
+
+        return websocket_client
+
+    async def aws_get(path: str) -> dict:
+        if path == "update_info":
+            return update_info
+        await asyncio.sleep(5)
+        return []
+
+    app = web.Application()
+    app.add_routes([web.get("/", ws_handler)])
+    for path in API_PATH_MAPPING.values():
+        app.add_routes([web.get(path, api_handler)])
+
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        server.host,
+        api_port=server.port,
+        ws_port=server.port,
+        username="username",
+        password="password",
+    )
+    client.aws_client.get = aws_get
+
+    snapshot = await client.snapshot(timeout=0.5)
+
+    assert snapshot.state.ok, "Missing local API data"
+    assert snapshot.device_info.data == device_info["response"]
+    assert snapshot.aws_update_info.data == update_info
+    assert not snapshot.complete, "Snapshot with a timed out source is complete"
+    assert list(snapshot.errors) == ["pet_status"], "Unexpected failed sources"
+    assert isinstance(snapshot.pet_status.error, TimeoutError)
+
+    await client.disconnect()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_prewarm(
+    aiohttp_server: any, fake_api: FakeAPI, device_info: any, update_info: any
+) -> None:
+    """Test prewarming connects all clients and keeps sessions open."""
+    calls = []
+
+    async def api_handler(request: web.Request) -> web.Response:
+        calls.append(request.path)
+        return web.json_response(
+            fake_api.get_activated_json_for_path(request.path), status=200
+        )
+
+    async def ws_handler(request: web.Request) -> web.WebSocketResponse:
+        websocket_client = web.WebSocketResponse()
+        await websocket_client.prepare(request)
+
+        async for _ in websocket_client:
+            calls.append("DeviceInfo")
+            await websocket_client.send_str(json.dumps(device_info["response"]))
+            await websocket_client.close()
+
+        return websocket_client
+
+    async def aws_get(path: str) -> dict:
+        calls.append(path)
+        return update_info
+
+    app = web.Application()
+    app.add_routes([web.get("/", ws_handler)])
+    for path in API_PATH_MAPPING.values():
+        app.add_routes([web.get(path, api_handler)])
+
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        server.host,
+        api_port=server.port,
+        ws_port=server.port,
+        username="username",
+        password="password",
+        prewarm=True,
+    )
+    client.aws_client.get = aws_get
+
+    async with client:
+        await asyncio.wait_for(client._prewarm_task, 1)
+        assert sorted(calls) == sorted(
+            [API_PATH_MAPPING["mode"], "DeviceInfo", "update_info"]
+        ), "Not all clients were prewarmed"
+
+        await client.get_modes()
+        assert not client.api_client.session.closed, "Session was not kept alive"
+
+    assert client.api_client.session.closed, "Session was not closed on exit"
+
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_prewarm_cancelled_on_disconnect() -> None:
+    """Test disconnecting waits until a running prewarm is cancelled."""
+    started = asyncio.Event()
+    cancelled = []
+
+    async def slow(*args: any) -> dict:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            # Cleaning up an in-flight request takes a moment
+            await asyncio.sleep(0.05)
+            cancelled.append(True)
+            raise
+        return {}
+
+    client = PyPetWALK("127.0.0.1", "username", "password", prewarm=True)
+    client.api_client.get_modes = slow
+    client.websocket_client.device_info = slow
+    client.aws_client.get = slow
+
+    async with client:
+        await asyncio.wait_for(started.wait(), 1)
+
+    assert client._prewarm_task is None, "Prewarm task was kept"
+    assert len(cancelled) == 3, "Prewarm requests were not cancelled before exit"
+
+
+@pytest.mark.asyncio
+async def test_is_reachable(aiohttp_server: any, fake_api: FakeAPI) -> None:
+    """Test reachability is probed once and then answered from cache."""
+
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response(
+            fake_api.get_activated_json_for_path(request.path), status=200
+        )
+
+    app = web.Application()
+    for path in API_PATH_MAPPING.values():
+        app.add_routes([web.get(path, handler)])
+
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        server.host, api_port=server.port, username="username", password="password"
+    )
+
+    results = await asyncio.gather(*(client.is_reachable() for _ in range(10)))
+    assert all(results), "Door should be reachable"
+    assert await client.is_reachable(), "Door should be reachable"
+    assert client.reachability.probes == 1, "Concurrent checks were not coalesced"
+
+    # A recent successful request is enough, no probe needed
+    client.reachability.cache_ttl = 0
+    await client.get_modes()
+    assert await client.is_reachable(), "Door should be reachable"
+    assert client.reachability.probes == 1, "Recent request was not used"
+
+    await server.close()
+
+    client.reachability.freshness = 0
+    assert not await client.is_reachable(), "Door should not be reachable"
+    with pytest.raises(PyPetWALKClientConnectionError):
+        await client.ping()
+
+
+@pytest.mark.asyncio
+async def test_single_flight_reads(
+    aiohttp_server: any, fake_api: FakeAPI, device_info: any
+) -> None:
+    """Test concurrent identical reads are collapsed into one request."""
+    calls = []
+
+    async def api_handler(request: web.Request) -> web.Response:
+        calls.append(request.path)
+        await asyncio.sleep(0.1)
+        return web.json_response(
+            fake_api.get_activated_json_for_path(request.path), status=200
+        )
+
+    async def ws_handler(request: web.Request) -> web.WebSocketResponse:
+        websocket_client = web.WebSocketResponse()
+        await websocket_client.prepare(request)
+
+        async for _ in websocket_client:
+            calls.append("DeviceInfo")
+            await asyncio.sleep(0.1)
+            await websocket_client.send_str(json.dumps(device_info["response"]))
+            await websocket_client.close()
+
+        return websocket_client
+
+    app = web.Application()
+    app.add_routes([web.get("/", ws_handler)])
+    for path in API_PATH_MAPPING.values():
+        app.add_routes([web.get(path, api_handler)])
+
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        server.host,
+        api_port=server.port,
+        ws_port=server.port,
+        username="username",
+        password="password",
+    )
+
+    results = await asyncio.gather(
+        *(client.get_modes() for _ in range(5)),
+        *(client.get_states() for _ in range(5)),
+        *(client.get_device_info() for _ in range(3)),
+    )
+
+    assert results[0] == fake_api.json_mode, "Incorrect modes"
+    assert results[5] == fake_api.json_state, "Incorrect states"
+    assert results[10] == device_info["response"], "Incorrect device info"
+    assert sorted(calls) == sorted(
+        [API_PATH_MAPPING["mode"], API_PATH_MAPPING["state"], "DeviceInfo"]
+    ), "Concurrent reads were not collapsed"
+    assert client.single_flight.collapsed == 10, "Incorrect collapsed counter"
+    assert client.api_client.session.closed, "Session was not closed after reads"
+
+    await client.disconnect()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_watch(aiohttp_server: any, fake_api: FakeAPI, device_info: any) -> None:
+    """Test watch yields only real changes from one shared poller."""
+
+    async def api_get_handler(request: web.Request) -> web.Response:
+        return web.json_response(
+            fake_api.get_activated_json_for_path(request.path), status=200
+        )
+
+    async def api_put_handler(request: web.Request) -> web.Response:
+        fake_api.json_state.update(await request.json())
+        return web.json_response({}, status=202)
+
+    async def ws_handler(request: web.Request) -> web.WebSocketResponse:
+        websocket_client = web.WebSocketResponse()
+        await websocket_client.prepare(request)
+
+        async for _ in websocket_client:
+            await websocket_client.send_str(json.dumps(device_info["response"]))
+            await websocket_client.close()
+
+        return websocket_client
+
+    app = web.Application()
+    app.add_routes([web.get("/", ws_handler)])
+    for path in API_PATH_MAPPING.values():
+        app.add_routes([web.get(path, api_get_handler)])
+        app.add_routes([web.put(path, api_put_handler)])
+
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        server.host,
+        api_port=server.port,
+        ws_port=server.port,
+        username="username",
+        password="password",
+    )
+    client.watcher.min_interval = 0.05
+
+    async def first_change(kinds: list[str] | None) -> ChangeEvent:
+        async with contextlib.aclosing(client.watch(kinds)) as changes:
+            async for change in changes:
+                return change
+
+    consumers = [
+        asyncio.create_task(first_change(None)),
+        asyncio.create_task(first_change([WATCH_CHANGE_DOOR])),
+    ]
+    while client.watcher.polls < 2:
+        await asyncio.sleep(0.01)
+    await client.set_door_state(True)
+
+    changes = await asyncio.wait_for(asyncio.gather(*consumers), 2)
+    for change in changes:
+        assert change.kind == WATCH_CHANGE_DOOR, "Unexpected change kind"
+        assert (change.old, change.new) == (False, True), "Unexpected door change"
+
+    assert client.watcher._task is None, "Poller still running without consumers"
+
+    await client.disconnect()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_aws_token_refresh(aiohttp_server: any, update_info: any) -> None:
+    """Test tokens are only renewed close to expiry and on 401."""
+    authorizations = []
+    logins = []
+
+    async def handler(request: web.Request) -> web.Response:
+        authorizations.append(request.headers["Authorization"])
+        if request.headers["Authorization"] == "revoked":
+            return web.json_response({}, status=401)
+        return web.json_response(update_info, status=200)
+
+    app = web.Application()
+    app.add_routes([web.get("/update_info", handler)])
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        "127.0.0.1",
+        aws_url=f"http://{server.host}:{server.port}",
+        username="username",
+        password="password",
+    )
+
+    async def authenticate(username: str, password: str) -> None:
+        logins.append(username)
+        token = make_jwt(time.time() + 3600, f"login-{len(logins)}")
+        client.aws_client.set_tokens(token, token, "refresh")
+
+    client.aws_client.cache.ttls.clear()
+    client.aws_client.authenticate = authenticate
+
+    await client.get_aws_update_info()
+    await client.get_aws_update_info()
+    assert len(logins) == 1, "Valid tokens must not trigger a new login"
+
+    # Token expires soon, request uses it and renews in background
+    expiring = make_jwt(time.time() + 60)
+    client.aws_client.set_tokens(expiring, expiring)
+    await client.get_aws_update_info()
+    assert authorizations[-1] == expiring, "Request waited for token renewal"
+    await client.aws_client._refresh_task
+    assert len(logins) == 2, "Tokens were not renewed in background"
+
+    # Unexpected 401 triggers one re-authentication and retry
+    client.aws_client.id_token = "revoked"
+    assert await client.get_aws_update_info() == update_info
+    assert len(logins) == 3, "401 did not trigger a new login"
+
+    await client.disconnect()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_aws_background_refresh_failure(
+    aiohttp_server: any, update_info: any
+) -> None:
+    """Test a failed background renewal keeps tokens and the shared session."""
+    started = asyncio.Event()
+    fail = asyncio.Event()
+
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response(update_info, status=200)
+
+    async def authenticate(username: str, password: str) -> None:
+        started.set()
+        await fail.wait()
+        raise PyPetWALKClientAWSAuthenticationError("failed")
+
+    app = web.Application()
+    app.add_routes([web.get("/update_info", handler)])
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        "127.0.0.1",
+        aws_url=f"http://{server.host}:{server.port}",
+        username="username",
+        password="password",
+    )
+    client.aws_client.cache.ttls.clear()
+    client.aws_client.authenticate = authenticate
+    expiring = make_jwt(time.time() + 60)
+    client.aws_client.set_tokens(expiring, expiring)
+
+    await client.aws_client.get_aws_update_info()
+    await asyncio.wait_for(started.wait(), 1)
+    fail.set()
+    await client.aws_client._refresh_task
+    assert client.aws_client.id_token == expiring, "Current tokens were dropped"
+    assert not client.aws_client.session.closed, "Shared session was closed"
+
+    # A running renewal does not outlive the client
+    started.clear()
+    fail.clear()
+    await client.aws_client.get_aws_update_info()
+    await asyncio.wait_for(started.wait(), 1)
+    refresh_task = client.aws_client._refresh_task
+    await client.disconnect()
+    assert refresh_task.cancelled(), "Background renewal was not cancelled"
+
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_aws_proactive_refresh() -> None:
+    """Test tokens are renewed before expiry without a request and not after close."""
+    logins = []
+    client = PyPetWALK("127.0.0.1", username="username", password="password")
+
+    async def authenticate(username: str, password: str) -> None:
+        logins.append(username)
+        token = make_jwt(time.time() + 3600)
+        client.aws_client.set_tokens(token, token)
+
+    client.aws_client.authenticate = authenticate
+    expiring = make_jwt(time.time() + AWS_TOKEN_REFRESH_MARGIN + 0.05)
+    client.aws_client.set_tokens(expiring, expiring)
+
+    await asyncio.sleep(0.1)
+    await client.aws_client._refresh_task
+    assert logins == ["username"], "Tokens were not renewed before expiry"
+
+    expiring = make_jwt(time.time() + AWS_TOKEN_REFRESH_MARGIN + 0.05)
+    client.aws_client.set_tokens(expiring, expiring)
+    await client.disconnect()
+    await asyncio.sleep(0.1)
+    assert len(logins) == 1, "Renewal was scheduled after disconnect"
+
+
+def test_file_token_store(tmp_path: any) -> None:
+    """Test tokens are stored owner-readable, encrypted and never downgraded."""
+    path = str(tmp_path / "tokens")
+    store = FileTokenStore(path)
+    newer = {"id_token": make_jwt(time.time() + 3600), "access_token": "access"}
+    older = {"id_token": make_jwt(time.time() + 60), "access_token": "access"}
+
+    store.save("username", newer)
+    store.save("username", older)
+    assert store.load("username") == newer, "Newer tokens were overwritten"
+    assert store.load("other") is None
+    assert os.stat(path).st_mode & 0o777 == 0o600, "Token file is not private"
+    with pytest.raises(TypeError):
+        TokenStore()
+
+    pytest.importorskip("cryptography")
+    from cryptography.fernet import Fernet
+
+    key = Fernet.generate_key()
+    encrypted_path = str(tmp_path / "encrypted")
+    FileTokenStore(encrypted_path, key).save("username", newer)
+    with open(encrypted_path, "rb") as token_file:
+        assert b"access" not in token_file.read(), "Tokens are stored in plain text"
+    assert FileTokenStore(encrypted_path, key).load("username") == newer
+    assert FileTokenStore(encrypted_path, Fernet.generate_key()).load("x") is None
+
+
+@pytest.mark.asyncio
+async def test_aws_incomplete_tokens_not_stored(
+    monkeypatch: any, tmp_path: any
+) -> None:
+    """Test a login without access token doesn't store placeholder tokens."""
+
+    class FakeCognito:
+        def __init__(self, *args: any, **kwargs: any) -> None:
+            self.id_token = make_jwt(time.time() + 3600)
+            self.access_token = None
+            self.refresh_token = "refresh"
+
+        def authenticate(self, password: str) -> None:
+            pass
+
+    monkeypatch.setattr("pycognito.Cognito", FakeCognito)
+    store = FileTokenStore(str(tmp_path / "tokens"))
+    client = PyPetWALK(
+        "127.0.0.1", username="username", password="password", token_store=store
+    )
+    await client.aws_client.authenticate("username", "password")
+    await client.disconnect()
+
+    assert store.load("username") is None, "Incomplete tokens were stored"
+
+
+@pytest.mark.asyncio
+async def test_aws_token_store(
+    aiohttp_server: any, update_info: any, tmp_path: any
+) -> None:
+    """Test stored tokens are reused instead of logging in again."""
+    logins = []
+
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response(update_info, status=200)
+
+    app = web.Application()
+    app.add_routes([web.get("/update_info", handler)])
+    server = await aiohttp_server(app)
+    store = FileTokenStore(str(tmp_path / "tokens"))
+    token = make_jwt(time.time() + 3600)
+    store.save("username", {"id_token": token, "access_token": token})
+    client = PyPetWALK(
+        "127.0.0.1",
+        aws_url=f"http://{server.host}:{server.port}",
+        username="username",
+        password="password",
+        token_store=store,
+    )
+
+    async def authenticate(username: str, password: str) -> None:
+        logins.append(username)
+
+    client.aws_client.authenticate = authenticate
+
+    assert await client.get_aws_update_info() == update_info
+    assert not logins, "Valid stored tokens must not trigger a login"
+    assert client.aws_client.id_token == token
+
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_aws_single_flight_authentication(
+    aiohttp_server: any, update_info: any
+) -> None:
+    """Test concurrent requests share one login, also after a 401."""
+    logins = []
+
+    async def handler(request: web.Request) -> web.Response:
+        if request.headers["Authorization"] == "revoked":
+            return web.json_response({}, status=401)
+        return web.json_response(update_info, status=200)
+
+    app = web.Application()
+    app.add_routes([web.get("/update_info", handler)])
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        "127.0.0.1",
+        aws_url=f"http://{server.host}:{server.port}",
+        username="username",
+        password="password",
+    )
+
+    async def authenticate(username: str, password: str) -> None:
+        logins.append(username)
+        await asyncio.sleep(0.05)
+        token = make_jwt(time.time() + 3600, f"login-{len(logins)}")
+        client.aws_client.set_tokens(token, token)
+
+    client.aws_client.rate_limiter = RateLimiter(rate=1000, burst=100)
+    client.aws_client.cache.ttls.clear()
+    client.aws_client.authenticate = authenticate
+
+    requests = [client.aws_client.get("update_info") for _ in range(10)]
+    assert await asyncio.gather(*requests) == [update_info] * 10
+    assert len(logins) == 1, "Concurrent requests triggered several logins"
+
+    client.aws_client.set_tokens("revoked", "revoked")
+    requests = [client.aws_client.get("update_info") for _ in range(10)]
+    assert await asyncio.gather(*requests) == [update_info] * 10
+    assert len(logins) == 2, "Concurrent 401 responses triggered several logins"
+
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_blocking_executor() -> None:
+    """Test blocking calls time out and are counted while queued or running."""
+    executor = BlockingExecutor(max_workers=1, timeout=0.2)
+    release = threading.Event()
+
+    slow = asyncio.create_task(executor.run(release.wait, 1))
+    queued = asyncio.create_task(executor.run(lambda: "done"))
+    await asyncio.sleep(0.05)
+    assert (executor.running, executor.queued) == (1, 1)
+
+    with pytest.raises(TimeoutError):
+        await slow
+    with pytest.raises(TimeoutError):
+        await queued
+    assert executor.timeouts == 2
+    assert executor.queued == 0, "Abandoned call is still counted as queued"
+
+    release.set()
+    executor.timeout = None
+    assert await executor.run(lambda: "done") == "done"
+    assert (executor.running, executor.queued) == (0, 0)
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_aws_injected_executor(monkeypatch: any) -> None:
+    """Test Cognito calls run in the injected executor."""
+    threads = []
+
+    class FakeCognito:
+        def __init__(self, *args: any, **kwargs: any) -> None:
+            threads.append(threading.current_thread().name)
+            token = make_jwt(time.time() + 3600)
+            self.id_token = self.access_token = token
+            self.refresh_token = "refresh"
+
+        def authenticate(self, password: str) -> None:
+            threads.append(threading.current_thread().name)
+
+    monkeypatch.setattr("pycognito.Cognito", FakeCognito)
+    with ThreadPoolExecutor(thread_name_prefix="injected") as pool:
+        client = PyPetWALK(
+            "127.0.0.1", username="username", password="password", aws_executor=pool
+        )
+        await client.aws_client.authenticate("username", "password")
+        await client.disconnect()
+
+    assert len(threads) == 2
+    assert all(name.startswith("injected") for name in threads)
+
+
+@pytest.mark.asyncio
+async def test_aws_executor_kept_until_disconnect(monkeypatch: any) -> None:
+    """Test closing the AWS session after a request keeps the thread pool."""
+
+    class FakeCognito:
+        def __init__(self, *args: any, **kwargs: any) -> None:
+            token = make_jwt(time.time() + 3600)
+            self.id_token = self.access_token = token
+            self.refresh_token = "refresh"
+
+        def authenticate(self, password: str) -> None:
+            pass
+
+    monkeypatch.setattr("pycognito.Cognito", FakeCognito)
+    client = PyPetWALK("127.0.0.1", username="username", password="password")
+    await client.aws_client.authenticate("username", "password")
+    pool = client.aws_client.executor._executor
+    await client.aws_client.close()
+    await client.aws_client.authenticate("username", "password")
+    assert client.aws_client.executor._executor is pool, "Thread pool was rebuilt"
+
+    await client.disconnect()
+    assert client.aws_client.executor._executor is None, "Thread pool was kept"
+
+
+def test_import_time_budget() -> None:
+    """Test importing pypetwalk doesn't load the AWS stack and stays fast."""
+    # aiohttp is always needed, so it is imported first and only our own import
+    # time counts. About 1.5x the 90-110ms measured, so a heavy import trips it
+    budget_us = 165_000
+    # Take the fastest of a few runs, so a busy machine or compiling stale
+    # bytecode doesn't count as import time
+    timings = []
+    for _ in range(3):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                "import sys, aiohttp, pypetwalk; print(*sorted(sys.modules))",
+            ],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        modules = result.stdout.split()
+        for heavy in ("pycognito", "boto3", "botocore", "cryptography"):
+            assert heavy not in modules, f"import pypetwalk loaded {heavy}"
+
+        cumulative = {}
+        for line in result.stderr.splitlines()[1:]:
+            _, duration, name = line.split("|")
+            cumulative[name.strip()] = int(duration)
+        timings.append(cumulative["pypetwalk"])
+
+    own = min(timings)
+    assert own < budget_us, f"import pypetwalk took {own}us after aiohttp"
+
+
+def test_import_keeps_logging_config() -> None:
+    """Test importing pypetwalk doesn't configure the root logger."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import logging, pypetwalk; root = logging.getLogger(); "
+            "print(len(root.handlers), root.level)",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    assert result.stdout.split() == ["0", str(logging.WARNING)]
+
+
+def test_request_logger(caplog: any) -> None:
+    """Test request logs are level guarded, rate limited and sampled."""
+    logger = logging.getLogger("pypetwalk.test")
+    request_log = RequestLogger(logger, rate=0, burst=2)
+
+    with caplog.at_level(logging.INFO, logger="pypetwalk.test"):
+        request_log.log("api", "GET", "/state")
+    assert not caplog.records, "Disabled level was logged"
+
+    with caplog.at_level(logging.DEBUG, logger="pypetwalk.test"):
+        for _ in range(5):
+            request_log.log("api", "PUT", "/state", params={"door": "open"})
+        assert len(caplog.records) == 2, "Rate limit was not applied"
+        assert request_log.suppressed == 3
+        assert caplog.records[0].request == {
+            "transport": "api",
+            "method": "PUT",
+            "path": "/state",
+            "params": {"door": "open"},
+        }
+
+        request_log.rate = 1000
+        time.sleep(0.01)
+        request_log.log("aws", "GET", "update_info")
+        assert caplog.records[-1].request["suppressed"] == 3
+        assert request_log.suppressed == 0
+
+        request_log.sample_rate = 0
+        request_log.log("aws", "GET", "update_info")
+        assert len(caplog.records) == 3, "Sampled out request was logged"
+        assert request_log.sampled_out == 1
+
+
+@pytest.mark.asyncio
+async def test_timeline_sync() -> None:
+    """Test the timeline only fetches the gap and answers narrower windows."""
+    requested = []
+    now = datetime.now(UTC)
+
+    def entry(event_id: int, age: timedelta) -> dict:
+        return {
+            "id": event_id,
+            "event_type": "open",
+            "event_source": "DOOR",
+            "date": (now - age).strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    events = [
+        entry(1, timedelta(days=20)),
+        entry(2, timedelta(days=3)),
+        entry(3, timedelta(minutes=30)),
+    ]
+
+    async def aws_get(path: str) -> list[dict]:
+        requested.append(path.split("intervalDays=")[1])
+        days = int(requested[-1])
+        return [
+            event
+            for event in events
+            if datetime.fromisoformat(event["date"]).replace(tzinfo=UTC)
+            >= now - timedelta(days=days)
+        ]
+
+    client = PyPetWALK("127.0.0.1", username="username", password="password")
+    client.aws_client.get = aws_get
+
+    timeline = await client.get_timeline(1, 7)
+    assert [event["id"] for event in timeline] == [2, 3]
+    assert requested == ["7"]
+
+    timeline = await client.get_timeline(1, 1 / 24)
+    assert [event["id"] for event in timeline] == [3]
+    assert requested == ["7"], "Narrower window was not answered locally"
+
+    # After max_age, only the gap since the last sync is requested
+    client.timeline.max_age = 0
+    events.append(entry(4, timedelta(0)))
+    timeline = await client.get_timeline(1, 7)
+    assert [event["id"] for event in timeline] == [2, 3, 4], "Events not merged"
+    assert requested == ["7", "1"]
+
+    timeline = await client.get_timeline(1, 30)
+    assert [event["id"] for event in timeline] == [1, 2, 3, 4]
+    assert requested == ["7", "1", "30"]
+
+    # Intervals beyond what the API serves are fetched once, not every call
+    client.timeline.max_age = 3600
+    max_days = client.timeline.max_days
+    await client.get_timeline(1, max_days + 35)
+    await client.get_timeline(1, max_days + 35)
+    assert requested == ["7", "1", "30", str(max_days)]
+
+    await client.disconnect()
+
+
+def test_event_date_formats() -> None:
+    """Test the local timeline accepts every date format Events accept."""
+    entries = [
+        {"id": event_id, "event_type": "open", "event_source": "DOOR", "date": date}
+        for event_id, date in enumerate(
+            ("2022-04-28T05:17:18", "2022-04-28T05:17:18.123Z")
+        )
+    ]
+
+    door = DoorTimeline()
+    assert door.merge(entries) == len(Event.from_list(entries)) == 2
+
+    invalid: list[dict] = []
+    pet_entry = {**entries[0], "pet": {"id": "pet", "name": "Cat", "species": 9}}
+    assert len(Event.from_list([pet_entry, entries[1]], invalid)) == 1
+    assert invalid == [pet_entry], "Unknown species did not mark the event invalid"
+
+
+@pytest.mark.asyncio
+async def test_timeline_backfill_single_request() -> None:
+    """Test backfill requests the whole range once, as the API has no ranges."""
+    now = datetime.now(UTC)
+    requested = []
+
+    async def fetch(door_id: int, days: int) -> list[dict]:
+        requested.append(days)
+        return [
+            {"id": event_id, "date": (now - timedelta(days=age)).isoformat()[:19]}
+            for event_id, age in ((1, 300), (2, 100), (3, 1))
+        ]
+
+    sync = TimelineSync(fetch)
+    timeline = await sync.backfill(1, 365)
+    assert requested == [365], "Range was not fetched with a single request"
+    assert [event["id"] for event in timeline] == [1, 2, 3]
+
+    await sync.get(1, timedelta(days=200))
+    assert requested == [365], "Backfilled range was fetched again"
+
+
+@pytest.mark.asyncio
+async def test_aws_response_cache(aiohttp_server: any, update_info: any) -> None:
+    """Test update info is cached, revalidated with ETag and door id memoised."""
+    requests = []
+    hang = asyncio.Event()
+
+    async def handler(request: web.Request) -> web.Response:
+        requests.append(request.headers.get("If-None-Match"))
+        if hang.is_set():
+            await asyncio.sleep(10)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.json_response(update_info, status=200, headers={"ETag": '"v1"'})
+
+    app = web.Application()
+    app.add_routes([web.get("/update_info", handler)])
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        "127.0.0.1",
+        aws_url=f"http://{server.host}:{server.port}",
+        username="username",
+        password="password",
+    )
+
+    async def authenticate(username: str, password: str) -> None:
+        token = make_jwt(time.time() + 3600)
+        client.aws_client.set_tokens(token, token)
+
+    client.aws_client.authenticate = authenticate
+    cache = client.aws_client.cache
+
+    (await client.get_aws_update_info()).clear()
+    assert await client.get_aws_update_info() == update_info, "Cache was mutated"
+    assert requests == [None], "Fresh response was requested again"
+    assert cache.hits == 1
+
+    # Stale response is served at once and revalidated in background
+    cache.ttls["update_info"] = 0
+    assert await client.get_aws_update_info() == update_info
+    await asyncio.gather(*client.aws_client._background_tasks)
+    assert requests == [None, '"v1"'], "Stale response was not revalidated"
+    assert cache.stale_hits == 1
+    assert cache.not_modified == 1
+
+    cache.ttls["update_info"] = 300
+    assert await client.get_device_id() == 1234
+    assert await client.get_device_id() == 1234
+    assert cache.hits == 2, "Door id was not memoised"
+    assert len(requests) == 2
+
+    # A running revalidation does not outlive the client
+    hang.set()
+    cache.ttls["update_info"] = 0
+    await client.get_aws_update_info()
+    (task,) = client.aws_client._background_tasks
+    await client.disconnect()
+    assert task.cancelled(), "Background revalidation was not cancelled"
+
+
+@pytest.mark.asyncio
+async def test_aws_rate_limit(aiohttp_server: any, update_info: any) -> None:
+    """Test throttling honours Retry-After and high priority calls pass first."""
+    responses = [web.json_response({}, status=429, headers={"Retry-After": "0.2"})]
+
+    async def handler(request: web.Request) -> web.Response:
+        if responses:
+            return responses.pop()
+        return web.json_response(update_info, status=200)
+
+    app = web.Application()
+    app.add_routes([web.get("/update_info", handler)])
+    app.add_routes([web.get("/door_events", handler)])
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        "127.0.0.1",
+        aws_url=f"http://{server.host}:{server.port}",
+        username="username",
+        password="password",
+    )
+    limiter = RateLimiter(
+        rate=100, burst=3, reserve=2, max_wait=1, account_rate=100, account_burst=3
+    )
+    client.aws_client.rate_limiter = limiter
+    client.aws_client.cache.ttls.clear()
+
+    async def authenticate(username: str, password: str) -> None:
+        token = make_jwt(time.time() + 3600)
+        client.aws_client.set_tokens(token, token)
+
+    client.aws_client.authenticate = authenticate
+
+    with pytest.raises(PyPetWALKRateLimited) as ex:
+        await client.aws_client.get("update_info")
+    assert ex.value.retry_after == 0.2
+    assert limiter.throttled == 1
+    assert limiter.account.blocked_until > time.monotonic(), "Account not paused"
+
+    start = time.monotonic()
+    assert await client.aws_client.get("update_info") == update_info
+    assert time.monotonic() - start >= 0.2, "Retry-After was not honoured"
+    assert limiter.delayed == 1
+
+    # Low priority calls wait for the account reserve, high priority ones don't
+    limiter.account.rate = 5
+    limiter.account.tokens = limiter.reserve
+    low = [
+        asyncio.create_task(
+            client.aws_client.get(f"door_events?deviceID=1&intervalDays={days}")
+        )
+        for days in (1, 2)
+    ]
+    await asyncio.sleep(0)
+    assert await client.aws_client.get("update_info") == update_info
+    assert not any(task.done() for task in low), "Low priority used the reserve"
+    assert await asyncio.gather(*low) == [update_info] * 2
+    assert limiter.shed == 0
+
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_aws_rate_limit_queues_low_priority(
+    aiohttp_server: any, get_timeline: list[dict]
+) -> None:
+    """Test low priority bursts wait for tokens and are only shed when blocked."""
+    requests = []
+
+    async def handler(request: web.Request) -> web.Response:
+        requests.append(request.query["intervalDays"])
+        return web.json_response(get_timeline, status=200)
+
+    app = web.Application()
+    app.add_routes([web.get("/door_events", handler)])
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        "127.0.0.1",
+        aws_url=f"http://{server.host}:{server.port}",
+        username="username",
+        password="password",
+    )
+
+    async def authenticate(username: str, password: str) -> None:
+        token = make_jwt(time.time() + 3600)
+        client.aws_client.set_tokens(token, token)
+
+    client.aws_client.authenticate = authenticate
+
+    await client.backfill_timeline(1234)
+    assert requests == ["365"], "Default backfill was not a single request"
+    assert client.aws_client.rate_limiter.shed == 0
+
+    # Default bursts and reserve, but a fast refill to keep the test quick
+    limiter = RateLimiter(rate=50, account_rate=50)
+    client.aws_client.rate_limiter = limiter
+    await asyncio.gather(
+        *(client.aws_client.get_timeline(1234, days) for days in range(1, 14))
+    )
+    assert limiter.shed == 0, "Low priority burst was shed instead of queued"
+    assert limiter.delayed > 0, "Low priority burst did not wait for tokens"
+
+    limiter.throttle("door_events", 5)
+    with pytest.raises(PyPetWALKRateLimited):
+        await client.aws_client.get_timeline(1234, 1)
+    assert limiter.shed == 1
+
+    await client.disconnect()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_follow_events() -> None:
+    """Test only new events are yielded and activity tightens the cadence."""
+    now = datetime.now(UTC)
+
+    def entry(event_id: int, age: timedelta) -> dict:
+        return {
+            "id": event_id,
+            "event_type": "open",
+            "event_source": "DOOR",
+            "date": (now - age).strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    events = [entry(1, timedelta(hours=1))]
+
+    async def aws_get(path: str) -> list[dict]:
+        return list(events)
+
+    async def api_set_state(state: str, value: bool) -> dict:
+        return {}
+
+    client = PyPetWALK("127.0.0.1", username="username", password="password")
+    client.aws_client.get = aws_get
+    client.api_client.set_state = api_set_state
+
+    follow = client.follow_events(1, min_interval=0.01, max_interval=0.04)
+    next_event = asyncio.create_task(anext(follow))
+    await asyncio.sleep(0.1)
+    (follower,) = client._followers
+    assert follower.interval == 0.04, "Idle follower did not back off"
+
+    events.extend([entry(3, timedelta(minutes=1)), entry(2, timedelta(minutes=2))])
+    assert (await asyncio.wait_for(next_event, 1)).id == 2, "Old event was yielded"
+    assert (await anext(follow)).id == 3
+    assert follower.interval == 0.01, "Cadence did not tighten after events"
+
+    # A door command wakes the follower at once, even with a long interval
+    follower.max_interval = follower.interval = 60
+    next_event = asyncio.create_task(anext(follow))
+    await asyncio.sleep(0.01)
+    polls = follower.polls
+    events.append(entry(4, timedelta(0)))
+    await client.set_state(API_STATE_DOOR, True)
+    assert (await asyncio.wait_for(next_event, 1)).id == 4
+    assert follower.polls == polls + 1
+
+    await follow.aclose()
+    assert not client._followers
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_follow_events_failed_baseline() -> None:
+    """Test old events are not yielded when the first polls fail."""
+    now = datetime.now(UTC)
+    failures = [TimeoutError(), PyPetWALKClientConnectionError("offline")]
+    events = [
+        {
+            "id": 1,
+            "event_type": "open",
+            "event_source": "DOOR",
+            "date": (now - timedelta(hours=5)).strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+    ]
+
+    async def aws_get(path: str) -> list[dict]:
+        if failures:
+            raise failures.pop(0)
+        return list(events)
+
+    client = PyPetWALK("127.0.0.1", username="username", password="password")
+    client.aws_client.get = aws_get
+
+    follow = client.follow_events(1, min_interval=0.01, max_interval=0.02)
+    next_event = asyncio.create_task(anext(follow))
+    await asyncio.sleep(0.1)
+    assert not failures, "Failed polls were not retried"
+    assert not next_event.done(), "Old event was yielded after a failed baseline"
+
+    events.append({**events[0], "id": 2, "date": now.strftime("%Y-%m-%dT%H:%M:%S")})
+    assert (await asyncio.wait_for(next_event, 1)).id == 2
+
+    await follow.aclose()
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_iter_timeline(aiohttp_server: any, get_timeline: list[dict]) -> None:
+    """Test the timeline is parsed while it is streamed."""
+    body = json.dumps(get_timeline + [{"id": 1}]).encode()
+
+    async def handler(request: web.Request) -> web.StreamResponse:
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        if request.query["deviceID"] == "2":
+            await resp.write(b'{"message": "Internal server error"}')
+            return resp
+        for pos in range(0, len(body), 100):
+            await resp.write(body[pos : pos + 100])
+        return resp
+
+    app = web.Application()
+    app.add_routes([web.get("/door_events", handler)])
+    server = await aiohttp_server(app)
+    client = PyPetWALK(
+        "127.0.0.1",
+        aws_url=f"http://{server.host}:{server.port}",
+        username="username",
+        password="password",
+    )
+
+    async def authenticate(username: str, password: str) -> None:
+        token = make_jwt(time.time() + 3600)
+        client.aws_client.set_tokens(token, token)
+
+    client.aws_client.authenticate = authenticate
+
+    events = [event async for event in client.iter_timeline(1, 30)]
+    assert [event.id for event in events] == [entry["id"] for entry in get_timeline]
+    assert all(isinstance(event, Event) for event in events)
+
+    with pytest.raises(PyPetWALKInvalidResponse):
+        async for _ in client.iter_timeline(2, 30):
+            pass
+
+    await client.disconnect()
+
+
+def test_json_array_parser() -> None:
+    """Test array items are decoded across arbitrary chunk boundaries."""
+    items = [{"name": "Kätzchen", "id": 1}, [1, 2], 123, -1.5e3, 0.25, -7, "done"]
+    body = json.dumps(items, ensure_ascii=False).encode()
+    # json.dumps writes -1500.0, the API may send exponents as well
+    body = body.replace(b"-1500.0", b"-1.5e3")
+
+    for size in (1, 2):
+        parser = JSONArrayParser()
+        decoded = []
+        for pos in range(0, len(body), size):
+            decoded.extend(parser.feed(body[pos : pos + size]))
+        decoded.extend(parser.close())
+        assert decoded == items, f"Items split in {size} byte chunks"
+
+    parser = JSONArrayParser()
+    assert parser.feed(b"[-1") == []
+    assert parser.feed(b".5e3, 2") == [-1.5e3]
+    assert parser.feed(b"]") == [2]
+
+    parser = JSONArrayParser()
+    parser.feed(b'[{"id": 1}, {"id"')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
 # @TODO - We need to test our new methods and the whole AWS Implementation!
 
 # from moto import mock_cognitoidp